@@ -4,11 +4,15 @@ import pandas as pd
 import numpy as np
 import uuid
 import time
-import heapq
-import plotly.graph_objects as go
-import backend
+import shutil
+import tempfile
+import weakref
 import grid as map_data
-import logic  
+import simulation
+import charging
+import render
+import runner
+import eventlog
 
 st.set_page_config(layout="wide", page_title="Medical Supply Chain Optimization", page_icon="")
 
@@ -24,163 +28,18 @@ st.markdown("""
 # init state
 if 'init' not in st.session_state:
     st.session_state.init = True
-    st.session_state.grid = map_data.create_floor_plan()
-    st.session_state.tasks = []
+    # older log events spill to a per-session folder instead of piling up in session state
+    log_dir = tempfile.mkdtemp(prefix="drone-events-")
+    st.session_state.sim = simulation.Simulation(prestage=True, log_dir=log_dir)
+    # the folder goes with the simulation: on RESET, when the session is dropped, or at exit
+    st.session_state.cleanup = weakref.finalize(st.session_state.sim, shutil.rmtree, log_dir, True)
     st.session_state.batch_stage = []
-    st.session_state.logs = []
-    st.session_state.co2_saved = 0.0
-    
-    
-    drone_init = [(1, 0), (2, 1), (1, 2)]
-    d_objs = [backend.Drone(f"D{i+1}") for i in range(3)]
-    
-    for i, d in enumerate(d_objs):
-        r, c = drone_init[i]
-        d.xposition = c
-        d.yposition = r
-        d.battery = 100.0
-
-    st.session_state.drones = [
-        {"id": f"D{i+1}", "obj": d_objs[i], "pos": list(drone_init[i]), "bat": 100.0, "status": "IDLE", "path": []}
-        for i in range(3)
-    ]
-
-# pathfinding helpers
-def get_neighbors(pos):
-    r, c = pos
-    for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
-        nr, nc = r+dr, c+dc
-        if map_data.is_walkable(st.session_state.grid, nr, nc):
-            yield (nr, nc)
-
-# implemented the A* algorithm to find the shortest path
-def find_path(start, end):
-    # assign tasks to idle drones
-    start, end = tuple(start), tuple(end)
-    pq = [(0, start)]
-    came_from = {start: None}
-    cost_so_far = {start: 0}
-    
-    while pq:
-        _, current = heapq.heappop(pq)
-        if current == end: break
-        
-        for next_node in get_neighbors(current):
-            new_cost = cost_so_far[current] + 1
-            if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
-                prio = new_cost + abs(end[0]-next_node[0]) + abs(end[1]-next_node[1])
-                heapq.heappush(pq, (prio, next_node))
-                came_from[next_node] = current
-                cost_so_far[next_node] = new_cost
-    
-    if end not in came_from: return []
-    path = []
-    curr = end
-    while curr != start:
-        path.append(curr)
-        curr = came_from[curr]
-    return path[::-1]
-
-# drone movement
-def update_simulation():
-   # multiple deliveries parallely
-    avail_indices = [i for i, d in enumerate(st.session_state.drones) if d['status'] == 'IDLE' and d['obj'].battery > 30]
-    
-    if st.session_state.tasks and hasattr(logic, 'prioritize_patients'):
-        st.session_state.tasks = logic.prioritize_patients(st.session_state.tasks)
-    elif st.session_state.tasks: 
-        st.session_state.tasks.sort(key=lambda x: x['priority'])
-
-    while st.session_state.tasks and avail_indices:
-        task = st.session_state.tasks.pop(0)
-        d_idx = avail_indices.pop(0)
-        drone = st.session_state.drones[d_idx]
-        d_obj = drone['obj']
-        
-        hub_center = map_data.TARGETS["Hub"]
-        target_loc = map_data.TARGETS[task['target']]
-        
-        # pickup
-        p1 = []
-        curr_r, curr_c = int(drone['pos'][0]), int(drone['pos'][1])
-        if st.session_state.grid[curr_r, curr_c] != map_data.ID_HUB:
-             p1 = find_path(drone['pos'], hub_center)
-        
-        # hub to dest
-        start_node = p1[-1] if p1 else drone['pos']
-        p2 = find_path(start_node, target_loc)
-        
-        if not p2 and start_node != target_loc:
-             st.session_state.logs.append(f"Path failed for {task['target']}")
-             continue
-
-        drone['path'] = p1 + p2
-        drone['status'] = f"DELIVERING: {task['item']}"
-        
-        s = backend.Supply(task['item'], task['weight'])
-        d_obj.load_supply(s)
-        st.session_state.logs.append(f"{drone['id']} dispatched -> {task['target']}")
-
-    # drone states
-    any_moving = False
-    
-    for d in st.session_state.drones:
-        d_obj = d['obj']
-        curr_r, curr_c = int(d['pos'][0]), int(d['pos'][1])
-        in_hub = (st.session_state.grid[curr_r, curr_c] == map_data.ID_HUB)
-
-        # moving?
-        if d['path']:
-            any_moving = True
-            next_step = d['path'].pop(0)
-            
-            # update backend
-            dy = next_step[0] - d_obj.yposition
-            dx = next_step[1] - d_obj.xposition
-            dirs = {(0,1):"right", (0,-1):"left", (1,0):"down", (-1,0):"up"}
-            cmd = dirs.get((dy, dx))
-            
-            if cmd:
-                d_obj.set_command(cmd)
-                d_obj.update()
-            
-            d['pos'] = [d_obj.yposition, d_obj.xposition]
-            d['bat'] = d_obj.battery
-            st.session_state.co2_saved += 0.05
-            
-            continue 
-
-        # task done
-        if d['status'].startswith("DELIVERING"):
-            d['status'] = "IDLE"
-            d_obj.unload_supply()
-            st.session_state.logs.append(f"{d['id']} Arrived at Destination.")
-
-        # return
-        elif d['status'] == "RETURNING":
-            d['status'] = "IDLE"
-            st.session_state.logs.append(f"{d['id']} Returned to Base.")
-
-        # returning/charging
-        elif d['status'] == "IDLE" or d['status'] == "CHARGING":
-            
-            # if at hub and battery low then CHARGE
-            if in_hub and d_obj.battery < 100:
-                d['status'] = "CHARGING"
-                d_obj.battery = min(100, d_obj.battery + 2.0)
-                d['bat'] = d_obj.battery
-            
-            # if at hub and battery full then IDLE
-            elif in_hub and d_obj.battery >= 100:
-                d['status'] = "IDLE"
-            
-            # if not at hub and battery low then RETURN
-            elif not in_hub and d_obj.battery < 30:
-                d['path'] = find_path(d['pos'], map_data.TARGETS["Hub"])
-                d['status'] = "RETURNING"
-                st.session_state.logs.append(f"{d['id']} Battery Low (<30% remaining). Returning to hub.")
+    st.session_state.view = render.FloorPlanView()
+    # the simulation steps on its own thread; take runner.lock to touch it
+    st.session_state.runner = runner.SimRunner(st.session_state.sim)
 
-    return any_moving
+sim = st.session_state.sim
+sim_runner = st.session_state.runner
 
 # frontend built with streamlit
 st.title("Medical Supply Chain Optimization")
@@ -226,7 +85,7 @@ with st.sidebar:
             real_weight = weight_classes[w_class][1]
             
             payload = {
-                "id": str(uuid.uuid4())[:4],
+                "id": str(uuid.uuid4())[:8],
                 "item": item,
                 "target": target,
                 "urgency": urgency_display, 
@@ -238,9 +97,8 @@ with st.sidebar:
             }
             
             if mode == "Single":
-                st.session_state.tasks.append(payload)
-                # sorting
-                st.session_state.tasks = logic.prioritize_patients(st.session_state.tasks)
+                with sim_runner.lock:
+                    sim.submit(payload)
                 st.success("Queued & Prioritized.")
             else:
                 st.session_state.batch_stage.append(payload)
@@ -249,89 +107,131 @@ with st.sidebar:
     if mode == "Batch" and st.session_state.batch_stage:
         st.info(f"Staged: {len(st.session_state.batch_stage)} tasks")
         if st.button("Launch as Batch"):
-            st.session_state.tasks.extend(st.session_state.batch_stage)
-            # sort whole batch
-            st.session_state.tasks = logic.prioritize_patients(st.session_state.tasks)
+            # staged payloads go out as multi-stop tours
+            with sim_runner.lock:
+                sim.submit_batch(st.session_state.batch_stage)
             st.session_state.batch_stage = []
             st.rerun()
 
     st.divider()
     run = st.toggle("See Simulation", value=False)
+    sim_runner.tick_rate = st.slider("Simulation Speed (ticks/s)", 1, 100, 10)
+    fps = st.slider("Refresh Rate (fps)", 1, 20, 5)
+    if run:
+        sim_runner.start()
+    else:
+        sim_runner.stop()
+
+    # hub charging bays
+    bays = st.number_input("Charging Bays (0 = unlimited)", min_value=0, max_value=20, value=0)
+    partial = st.toggle("Partial Charging", value=False, help="Release drones once they hold what the next queued task needs")
+    # hallway closures (cleaning, spills, transfers); drones in flight reroute around them
+    with st.expander("Hallway Closures"):
+        rows, cols = sim.grid.shape
+        c_row = st.number_input("Row", min_value=0, max_value=rows - 1, value=4)
+        c_col = st.number_input("Column", min_value=0, max_value=cols - 1, value=6)
+        c_len = st.number_input("Cells (along the row)", min_value=1, max_value=cols, value=1)
+        close_col, open_col = st.columns(2)
+        if close_col.button("Close"):
+            with sim_runner.lock:
+                sim.close([(c_row, c) for c in range(c_col, min(cols, c_col + c_len))])
+        if open_col.button("Reopen All"):
+            with sim_runner.lock:
+                sim.reopen()
+        with sim_runner.lock:
+            n_closed = len(sim.closures)
+        st.caption(f"{n_closed} cells closed")
+
+    # large fleets are drawn as density; pick the layer and which drones to follow
+    view = st.session_state.view
+    with sim_runner.lock:
+        dense = view.dense(sim.drones)
+        drone_ids = [d['id'] for d in sim.drones]
+    if dense:
+        layer = st.radio("Density", ["occupancy", "traffic"], horizontal=True)
+        tracked = st.multiselect("Track Drones", drone_ids, max_selections=render.MAX_MARKERS)
+    else:
+        layer, tracked = "occupancy", []
+
+    with sim_runner.lock:
+        sim.charging.bays = bays or None
+        sim.charging.policy = charging.NeedCharge() if partial else charging.FullCharge()
     
     if st.button("RESET"):
+        sim_runner.stop()
+        st.session_state.cleanup()
         st.session_state.clear()
         st.rerun()
 
-# tabs
-tab1, tab2, tab3 = st.tabs(["Floor Plan", "Queues", "Drone Status"])
+# live panels rerun on their own (fragments) while the simulation runs; the rest of the page doesn't
+live_every = 1.0 / fps if run else None
 
-with tab1:
-    col_viz, col_data = st.columns([3, 1])
-    
-    with col_viz:
-        fig = go.Figure()
-
-        # map as trace
-        fig.add_trace(go.Heatmap(z=st.session_state.grid, colorscale=map_data.COLOR_MAP, showscale=False, hoverinfo='skip'))
 
-        # add label
-        fig.add_trace(go.Scatter(
-            x=[l['x'] for l in map_data.LABELS], 
-            y=[l['y'] for l in map_data.LABELS],
-            text=[l['txt'] for l in map_data.LABELS],
-            mode="text", textfont=dict(color="white", size=14, family="Arial Black")
-        ))
-
-        # draw paths
-        for d in st.session_state.drones:
-            if d['path']:
-                px = [d['pos'][1]] + [p[1] for p in d['path']]
-                py = [d['pos'][0]] + [p[0] for p in d['path']]
-                fig.add_trace(go.Scatter(x=px, y=py, mode='lines', line=dict(color='#00FF00', width=2, dash='dot'), hoverinfo='skip'))
-
-        # drones
-        dx = [d['pos'][1] for d in st.session_state.drones]
-        dy = [d['pos'][0] for d in st.session_state.drones]
-        c_map = {"IDLE":"#00FF00", "CHARGING":"#00FFFF"}
-        colors = [c_map.get(d['status'], "#FFA500") for d in st.session_state.drones]
+@st.fragment(run_every=live_every)
+def floor_plan():
+    col_viz, col_data = st.columns([3, 1])
 
-        fig.add_trace(go.Scatter(
-            x=dx, y=dy, mode='markers+text',
-            marker=dict(size=20, color=colors, line=dict(width=2, color='white')),
-            text=[f"{d['id']}" for d in st.session_state.drones],
-            textposition="top center", textfont=dict(color="white")
-        ))
+    with sim_runner.lock:
+        # static layers are cached in the view (the chart still ships the whole figure)
+        fig = view.figure(sim.grid, sim.drones, tracked, layer, sim.grid_version)
+        queued = len(sim.tasks)
+        co2 = sim.co2_saved
+        hub = sim.charging.metrics()
+        ids = [d['id'] for d in sim.drones]
 
-        fig.update_layout(height=650, margin=dict(l=0, r=0, t=0, b=0), yaxis=dict(autorange='reversed', visible=False, scaleanchor="x"), xaxis=dict(visible=False), plot_bgcolor='#0e1117', paper_bgcolor='#0e1117')
+    with col_viz:
         st.plotly_chart(fig, width="stretch")
 
     with col_data:
         st.subheader("Live Stats")
-        st.metric("Queue", len(st.session_state.tasks))
-        st.metric("CO₂ Saved", f"{st.session_state.co2_saved:.2f}g")
+        st.metric("Queue", queued)
+        st.metric("CO₂ Saved", f"{co2:.2f}g")
+        st.metric("Charging", f"{hub['charging']}/{hub['bays'] or '∞'} bays", f"{hub['queued']} waiting", delta_color="off")
+        if hub['bays']:
+            st.caption(f"Bay utilization {hub['utilization']:.0%} · wait p95 {hub['p95_wait']:.0f} ticks")
+        # filter the event log by drone or event kind
+        f_drone, f_kind = st.columns(2)
+        who = f_drone.selectbox("Drone", ["All"] + ids, label_visibility="collapsed")
+        kind = f_kind.selectbox("Event", ["All"] + list(eventlog.KINDS), label_visibility="collapsed")
+        with sim_runner.lock:
+            events = sim.events.query(None if who == "All" else who, None if kind == "All" else kind, limit=10)
         log_box = st.container(height=350)
-        for l in reversed(st.session_state.logs[-10:]):
-            log_box.caption(l)
+        for e in events:
+            log_box.caption(e.text)
 
-with tab2:
+
+@st.fragment(run_every=live_every)
+def queue_table():
     # display queue with new priority fields
-    if st.session_state.tasks:
-        df = pd.DataFrame(st.session_state.tasks)[['id', 'item', 'target', 'ctas', 'urgency', 'supply_weight']]
+    with sim_runner.lock:
+        tasks = list(sim.tasks)
+    if tasks:
+        df = pd.DataFrame(tasks).reindex(columns=['id', 'item', 'target', 'ctas', 'urgency', 'supply_weight'])
         st.dataframe(df, width="stretch")
     else:
         st.info("No tasks in queue")
 
-with tab3:
-    cols = st.columns(3)
-    for i, d in enumerate(st.session_state.drones):
+
+@st.fragment(run_every=live_every)
+def drone_status():
+    with sim_runner.lock:
+        drones = [(d['id'], d['bat'], d['status']) for d in sim.drones]
+    cols = st.columns(len(drones))
+    for i, (name, bat, status) in enumerate(drones):
         with cols[i]:
-            bat = d['bat']
-            color = "green" if bat > 50 else "red"
-            st.metric(f"{d['id']}", f"{int(bat)}%")
+            st.metric(f"{name}", f"{int(bat)}%")
             st.progress(int(bat)/100)
-            st.caption(d['status'])
+            st.caption(status)
+
+
+# tabs
+tab1, tab2, tab3 = st.tabs(["Floor Plan", "Queues", "Drone Status"])
+
+with tab1:
+    floor_plan()
 
-if run:
-    update_simulation()
-    time.sleep(0.1)
-    st.rerun()
\ No newline at end of file
+with tab2:
+    queue_table()
+
+with tab3:
+    drone_status()
@@ -0,0 +1,192 @@
+import numpy as np
+import backend
+import grid as map_data
+
+# cost units are steps of travel
+UNREACHABLE = 1e9
+
+# queue depth considered per idle drone in each dispatch round
+CANDIDATES_PER_DRONE = 4
+
+
+def hungarian(cost):
+    """
+    Minimum-cost assignment (shortest augmenting path Hungarian method).
+    cost may be rectangular; every row (or column, if there are fewer) is
+    matched. Returns (row_ind, col_ind) sorted by row, like
+    scipy.optimize.linear_sum_assignment.
+    """
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return _unpack(np.arange(0), np.arange(0), transposed)
+    keep = _candidate_columns(cost)
+    cost = cost[:, keep]
+    m = len(keep)
+
+    # start from row minima and let each row take its cheapest free column;
+    # v stays 0 on unmatched columns, as the rectangular case requires
+    u = cost.min(axis=1)
+    v = np.zeros(m)
+    col4row = np.full(n, -1)
+    row4col = np.full(m, -1)
+    for i, j in enumerate(cost.argmin(axis=1)):
+        if row4col[j] < 0:
+            row4col[j] = i
+            col4row[i] = j
+
+    for cur in np.flatnonzero(col4row < 0):
+        shortest = np.full(m, np.inf)
+        path = np.full(m, -1)
+        seen_rows = np.zeros(n, dtype=bool)
+        seen_cols = np.zeros(m, dtype=bool)
+        min_val = 0.0
+        i = cur
+        sink = -1
+        while sink < 0:
+            seen_rows[i] = True
+            reduced = min_val + cost[i] - u[i] - v
+            better = ~seen_cols & (reduced < shortest)
+            path[better] = i
+            shortest[better] = reduced[better]
+            masked = np.where(seen_cols, np.inf, shortest)
+            j = int(np.argmin(masked))
+            min_val = masked[j]
+            if not np.isfinite(min_val):
+                raise ValueError("cost matrix is infeasible")
+            seen_cols[j] = True
+            if row4col[j] < 0:
+                sink = j
+            else:
+                i = row4col[j]
+
+        # dual update
+        u[cur] += min_val
+        others = seen_rows.copy()
+        others[cur] = False
+        u[others] += min_val - shortest[col4row[others]]
+        v[seen_cols] -= min_val - shortest[seen_cols]
+
+        # augment along the path back to cur
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur:
+                break
+
+    return _unpack(np.arange(n), keep[col4row], transposed)
+
+
+def _candidate_columns(cost):
+    # a row's match is always among its n cheapest columns (otherwise one of
+    # those is free and cheaper), so no other column needs to be considered
+    n, m = cost.shape
+    if m <= n:
+        return np.arange(m)
+    return np.unique(np.argpartition(cost, n - 1, axis=1)[:, :n])
+
+
+def _unpack(rows, cols, transposed):
+    if transposed:
+        order = np.argsort(cols)
+        return cols[order], rows[order]
+    return rows, cols
+
+
+def priority_columns(feasible):
+    """
+    Tasks (columns, in priority order) to serve with the drones (rows):
+    each task in turn is taken if the drones can still cover it together
+    with every task taken before it (feasible[i, j]: drone i can do task j).
+    No task is ever passed over for a later one, however much closer the
+    later one is. Returns the taken column indices in order.
+    """
+    feasible = np.asarray(feasible, dtype=bool)
+    n, m = feasible.shape
+    col4row = np.full(n, -1)
+    row4col = np.full(m, -1)
+    taken = []
+    for j in range(m):
+        if len(taken) == n:
+            break
+        free = np.flatnonzero(feasible[:, j] & (col4row < 0))
+        if free.size:
+            col4row[free[0]] = j
+            row4col[j] = free[0]
+            taken.append(j)
+        elif feasible[:, j].any() and _augment(feasible, j, col4row, row4col):
+            taken.append(j)
+    return np.array(taken, dtype=np.int64)
+
+
+def _augment(feasible, start, col4row, row4col):
+    # breadth-first search for a path from column start to a free row,
+    # alternating feasible and matched edges; flip it if found
+    seen = np.zeros(len(col4row), dtype=bool)
+    came_from = {}
+    queue = [start]
+    for j in queue:
+        rows = np.flatnonzero(feasible[:, j] & ~seen)
+        seen[rows] = True
+        for i in rows.tolist():
+            came_from[i] = j
+            if col4row[i] < 0:
+                while True:
+                    j = came_from[i]
+                    prev = row4col[j]
+                    col4row[i], row4col[j] = j, i
+                    if j == start:
+                        return True
+                    i = prev
+            queue.append(col4row[i])
+    return False
+
+
+def priority_assignment(cost):
+    """
+    Match drones (rows) to tasks (columns, in priority order): the tasks
+    are priority_columns() of the reachable pairs (cost < UNREACHABLE),
+    and the drones are matched to them at minimum total cost. Returns
+    (row_ind, col_ind) sorted by row, like hungarian().
+    """
+    cost = np.asarray(cost, dtype=float)
+    cols = priority_columns(cost < UNREACHABLE)
+    rows, picked = hungarian(cost[:, cols])
+    return rows, cols[picked]
+
+
+def dispatch_costs(grid, routes, positions, tasks, hub=None):
+    """
+    Cost of sending each drone (row) to each task (column): steps via the
+    hub to the target, plus battery drain at the task's weight multiplier.
+    Priority is not a cost term: priority_assignment() picks which tasks
+    are served in triage order and only then minimizes this cost.
+    """
+    hub = tuple(map_data.TARGETS["Hub"] if hub is None else hub)
+    cols = grid.shape[1]
+    pos = np.array([int(r) * cols + int(c) for r, c in positions], dtype=np.int64)
+    in_hub = grid.ravel()[pos] == map_data.ID_HUB
+
+    to_hub = routes.distance_field(grid, hub)[pos].astype(float)
+    to_hub[to_hub < 0] = np.inf
+    travel = np.empty((len(pos), len(tasks)))
+    fields = {}
+    for j, task in enumerate(tasks):
+        target = tuple(map_data.TARGETS[task['target']])
+        if target not in fields:
+            field = routes.distance_field(grid, target).astype(float)
+            field[field < 0] = np.inf
+            fields[target] = (field[pos], field[hub[0] * cols + hub[1]])
+        direct, from_hub = fields[target]
+        travel[:, j] = np.where(in_hub, direct, to_hub + from_hub)
+
+    mult = np.array([backend.weight_to_multiplier(t['weight']) or 1.0 for t in tasks])
+    drain = travel * 0.5 * mult
+    cost = travel + drain
+    cost[~np.isfinite(travel)] = UNREACHABLE
+    return cost
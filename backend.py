@@ -28,8 +28,10 @@ def weight_to_multiplier(weight):
 
 # drone class
 class Drone:
-    def __init__(self, name):
+    def __init__(self, name, width=GRID_WIDTH, height=GRID_HEIGHT):
         self.name = name
+        self.width = width
+        self.height = height
         self.xposition = 0
         self.yposition = 0
         self.battery = 100
@@ -93,7 +95,7 @@ class Drone:
         new_y = self.yposition + dy
 
         # inside grid?
-        if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT:
+        if 0 <= new_x < self.width and 0 <= new_y < self.height:
             self.xposition = new_x
             self.yposition = new_y
             self.battery -= 0.5 * self.multiplier
@@ -0,0 +1,110 @@
+"""
+Benchmark the tuple-based A* from app.find_path against pathfinding.GridPathfinder
+and hpa.HierarchicalPathfinder on large synthetic floor plans.
+
+    python bench_pathfinding.py [size ...]
+"""
+import sys
+import time
+import heapq
+import random
+import numpy as np
+import grid as map_data
+from pathfinding import GridPathfinder
+from hpa import HierarchicalPathfinder
+
+
+def make_floor_plan(size, seed=0):
+    """Hallway lattice every 4 cells with rooms and some closed hallway segments."""
+    rng = np.random.RandomState(seed)
+    grid = np.full((size, size), map_data.ID_WALL, dtype=np.int64)
+    grid[::4, :] = map_data.ID_HALLWAY
+    grid[:, ::4] = map_data.ID_HALLWAY
+    # open some blocks up as rooms
+    for r in range(1, size - 3, 4):
+        for c in range(1, size - 3, 4):
+            if rng.rand() < 0.3:
+                grid[r:r + 3, c:c + 3] = map_data.ID_ER
+    # close hallway segments to force detours
+    closed = rng.rand(size, size) < 0.08
+    grid[closed & (grid == map_data.ID_HALLWAY)] = map_data.ID_WALL
+    return grid
+
+
+def legacy_find_path(grid, start, end):
+    # app.find_path / get_neighbors, with the bounds check taken from the grid shape
+    rows, cols = grid.shape
+
+    def get_neighbors(pos):
+        r, c = pos
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and grid[nr, nc] != map_data.ID_WALL:
+                yield (nr, nc)
+
+    start, end = tuple(start), tuple(end)
+    pq = [(0, start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    while pq:
+        _, current = heapq.heappop(pq)
+        if current == end: break
+        for next_node in get_neighbors(current):
+            new_cost = cost_so_far[current] + 1
+            if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
+                prio = new_cost + abs(end[0]-next_node[0]) + abs(end[1]-next_node[1])
+                heapq.heappush(pq, (prio, next_node))
+                came_from[next_node] = current
+                cost_so_far[next_node] = new_cost
+    if end not in came_from: return []
+    path = []
+    curr = end
+    while curr != start:
+        path.append(curr)
+        curr = came_from[curr]
+    return path[::-1]
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    out = [fn(s, e) for s, e in queries]
+    return time.perf_counter() - t0, out
+
+
+def run(size, n_queries=20, seed=0):
+    grid = make_floor_plan(size, seed)
+    cells = list(zip(*np.nonzero(grid != map_data.ID_WALL)))
+    rng = random.Random(seed)
+    queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(n_queries)]
+
+    t0 = time.perf_counter()
+    pf = GridPathfinder(grid)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hp = HierarchicalPathfinder(grid)
+    t_hpa_build = time.perf_counter() - t0
+
+    t_legacy, ref = timed(lambda s, e: legacy_find_path(grid, s, e), queries)
+    t_astar, a = timed(pf.astar, queries)
+    t_jps, j = timed(pf.jps, queries)
+    t_hpa, hp_paths = timed(hp.find_path, queries)
+
+    for r, x, y in zip(ref, a, j):
+        assert len(r) == len(x) == len(y), "path length mismatch"
+    # HPA* is near-optimal: report how much longer its paths are
+    found = [(len(h), len(r)) for h, r in zip(hp_paths, ref) if r]
+    excess = sum(h for h, _ in found) / max(1, sum(r for _, r in found)) - 1
+
+    print(f"{size}x{size}: build {t_build * 1000:.1f} ms | "
+          f"legacy {t_legacy / n_queries * 1000:.2f} ms/query | "
+          f"astar {t_astar / n_queries * 1000:.2f} ms ({t_legacy / t_astar:.1f}x) | "
+          f"jps {t_jps / n_queries * 1000:.2f} ms ({t_legacy / t_jps:.1f}x) | "
+          f"hpa {t_hpa / n_queries * 1000:.2f} ms ({t_legacy / t_hpa:.1f}x, "
+          f"build {t_hpa_build:.2f} s, +{excess * 100:.1f}% length)")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 300, 600]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,64 @@
+"""
+Measure request-to-delivery latency with and without predictive staging of
+idle drones. Both runs see the same request stream: the target mix shifts
+with the time of day (ER-heavy days, OR-heavy nights). The first day only
+warms up the demand model, the rest is measured.
+
+    python bench_staging.py [days] [drones] [rate]
+"""
+import io
+import sys
+import time
+import contextlib
+import numpy as np
+import simulation
+import sweep
+
+DAY = 24 * 3600
+TARGETS = ["Maternity", "ICU", "Waiting Room", "ER", "OR"]
+DAY_MIX = [0.10, 0.10, 0.10, 0.50, 0.20]
+NIGHT_MIX = [0.05, 0.10, 0.05, 0.20, 0.60]
+
+
+def requests(days, rate, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for hour in range(days * 24):
+        mix = DAY_MIX if 8 <= hour % 24 < 20 else NIGHT_MIX
+        for t, task in sweep.synthetic_requests(rng, 3600, rate, TARGETS, mix):
+            task = dict(task, id=f"{hour}-{task['id']}", arrival_time=float(hour * 3600 + t))
+            out.append((hour * 3600 + t, task))
+    return out
+
+
+def run(reqs, ticks, drones, prestage):
+    sim = simulation.Simulation(n_drones=drones, prestage=prestage)
+    pending = iter(reqs)
+    nxt = next(pending, None)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # backend.Drone prints every load
+        for tick in range(ticks):
+            while nxt is not None and nxt[0] <= tick:
+                sim.submit(nxt[1])
+                nxt = next(pending, None)
+            sim.step()
+    elapsed = time.perf_counter() - t0
+    lat = np.array([c["delivered"] - c["request"] for c in sim.completed if c["request"] >= DAY])
+    return lat, elapsed
+
+
+def main(days=3, drones=3, rate=0.01):
+    reqs = requests(days, rate)
+    ticks = days * DAY
+    print(f"{len(reqs)} requests over {days} days, {drones} drones")
+    for label, prestage in (("baseline", False), ("staging", True)):
+        lat, elapsed = run(reqs, ticks, drones, prestage)
+        print(f"{label:<9} p50={np.percentile(lat, 50):6.1f}  p95={np.percentile(lat, 95):6.1f}  "
+              f"mean={lat.mean():6.1f} ticks  ({len(lat)} measured, {ticks / elapsed:.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 3,
+         int(args[1]) if len(args) > 1 else 3,
+         float(args[2]) if len(args) > 2 else 0.01)
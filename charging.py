@@ -0,0 +1,100 @@
+from collections import deque
+import numpy as np
+
+
+class FullCharge:
+    """Keep a drone on the charger until it is full (the original behaviour)."""
+    def release_level(self, need):
+        return 100.0
+
+
+class NeedCharge:
+    """
+    Partial charging: while tasks are waiting, release a drone as soon as it
+    holds what the next queued task needs (never below `floor`); with an
+    empty queue charge to full.
+    """
+    def __init__(self, floor=40.0, margin=5.0):
+        self.floor = floor
+        self.margin = margin
+
+    def release_level(self, need):
+        if need is None or not np.isfinite(need):
+            return 100.0
+        return float(min(100.0, max(self.floor, need + self.margin)))
+
+
+class ChargingHub:
+    """
+    Charging bays at the hub. Drones ask for a bay each tick they want to
+    charge; when every bay is taken they wait in a FIFO queue. A drone only
+    charges (+rate per tick) while it holds a bay, and gives it up when it
+    leaves or reaches the policy's release level. bays=None means unlimited.
+    Bay-ticks used, queue waits and queue length are kept for sizing the hub.
+    """
+    def __init__(self, bays=None, rate=2.0, policy=None):
+        self.bays = bays
+        self.rate = rate
+        self.policy = policy if policy is not None else FullCharge()
+        self.holding = {}       # drone id -> tick it got its bay
+        self.queue = deque()    # drone ids waiting for a bay
+        self._queued_at = {}
+        self.waits = []         # ticks each session waited for its bay
+        self.busy_ticks = 0
+        self.sessions = 0
+        self.max_queue = 0
+        self.start = None
+        self.now = None
+
+    def free_bays(self):
+        return float("inf") if self.bays is None else self.bays - len(self.holding)
+
+    def release_level(self, need=None):
+        return self.policy.release_level(need)
+
+    def request(self, drone, tick):
+        """Ask for a bay for this tick; True if drone holds one (and charges)."""
+        self._seen(tick)
+        if drone not in self.holding:
+            if drone not in self._queued_at:
+                self.queue.append(drone)
+                self._queued_at[drone] = tick
+            while self.queue and self.free_bays() > 0:
+                nxt = self.queue.popleft()
+                self.waits.append(tick - self._queued_at.pop(nxt))
+                self.holding[nxt] = tick
+                self.sessions += 1
+            self.max_queue = max(self.max_queue, len(self.queue))
+        if drone in self.holding:
+            self.busy_ticks += 1
+            return True
+        return False
+
+    def release(self, drone):
+        """Drone left the charger or the queue."""
+        self.holding.pop(drone, None)
+        if self._queued_at.pop(drone, None) is not None:
+            self.queue.remove(drone)
+
+    def charge(self, battery):
+        return min(100.0, battery + self.rate)
+
+    def _seen(self, tick):
+        if self.start is None:
+            self.start = tick
+        self.now = tick if self.now is None else max(self.now, tick)
+
+    def metrics(self):
+        """Bay utilization and queue wait statistics since the first request."""
+        span = 0 if self.start is None else self.now - self.start + 1
+        waits = np.array(self.waits, dtype=float)
+        return {
+            "bays": self.bays,
+            "utilization": (self.busy_ticks / (self.bays * span)) if self.bays and span else float("nan"),
+            "sessions": self.sessions,
+            "charging": len(self.holding),
+            "queued": len(self.queue),
+            "max_queue": self.max_queue,
+            "mean_wait": float(waits.mean()) if waits.size else 0.0,
+            "p95_wait": float(np.percentile(waits, 95)) if waits.size else 0.0,
+        }
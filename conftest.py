@@ -0,0 +1,50 @@
+from collections import deque
+import numpy as np
+import pytest
+import grid as map_data
+
+
+def random_grid(rng, walls=0.3, sizes=(5, 40)):
+    """A random hallway/wall grid with each side in [sizes[0], sizes[1])."""
+    rows, cols = rng.randint(sizes[0], sizes[1], 2)
+    return np.where(rng.rand(rows, cols) < walls, map_data.ID_WALL, map_data.ID_HALLWAY).astype(np.uint8)
+
+
+def bfs_field(grid, start):
+    """
+    Steps from start to every cell (-1 = unreachable) over the grid's open
+    cells. The reference every planner is checked against.
+    """
+    rows, cols = grid.shape
+    dist = np.full(grid.shape, -1, dtype=np.int64)
+    dist[start] = 0
+    queue = deque([tuple(start)])
+    while queue:
+        r, c = queue.popleft()
+        for nxt in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nxt[0] < rows and 0 <= nxt[1] < cols and grid[nxt] != map_data.ID_WALL \
+                    and dist[nxt] < 0:
+                dist[nxt] = dist[r, c] + 1
+                queue.append(nxt)
+    return dist
+
+
+def bfs_distance(grid, start, end):
+    """Steps from start to end, None if unreachable."""
+    d = bfs_field(grid, tuple(start))[tuple(end)]
+    return None if d < 0 else int(d)
+
+
+@pytest.fixture
+def make_grid():
+    return random_grid
+
+
+@pytest.fixture
+def bfs():
+    return bfs_field
+
+
+@pytest.fixture
+def distance():
+    return bfs_distance
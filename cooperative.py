@@ -0,0 +1,326 @@
+import heapq
+import itertools
+from collections import defaultdict
+import grid as map_data
+import routing
+
+
+class CooperativePlanner:
+    """
+    Collision-free planning for the fleet on a space-time reservation table.
+
+    Drones are planned one at a time (prioritized planning): each plan is a
+    space-time A* that may wait in place, and the (cell, tick) slots it uses
+    are reserved so later drones route around it. Only hallway cells are
+    exclusive; rooms (Hub, ICU, ...) can hold several drones at once, which
+    is where drones charge and queue anyway.
+
+    When a drone cannot be planned around the existing reservations, the
+    few drones blocking its route are released and the group is replanned
+    together with Conflict-Based Search.
+
+    Paths are lists of (row, col), one per tick after the start tick, with
+    repeated cells meaning "wait".
+    """
+    def __init__(self, grid, routes=None, max_wait=64, cbs_limit=4, cbs_expansions=200):
+        self.routes = routes if routes is not None else routing.RouteCache()
+        self.max_wait = max_wait
+        self.cbs_limit = cbs_limit
+        self.cbs_expansions = cbs_expansions
+
+        self._res = defaultdict(dict)    # cell -> {tick: drone}
+        self._edges = {}                 # (from, to, tick) -> drone
+        self._parked = {}                # cell -> (drone, from tick)
+        self._by_tick = defaultdict(list)
+        self._plans = {}                 # drone -> {"t0", "cells", "legs"}
+        self.replanned = {}              # drone -> new remaining path, set by CBS
+        self.grid = None
+        self.grid_version = None
+        self.sync(grid, 0)
+
+    def sync(self, grid, version):
+        """Pick up a new grid, or the same one edited in place under a new version."""
+        if grid is self.grid and version == self.grid_version:
+            return
+        self.grid = grid
+        self.grid_version = version
+        self.exclusive = grid == map_data.ID_HALLWAY
+        self._fields = {}
+        self._table = map_data.NeighborTable(grid)
+        self._moves = {}  # cell -> (cell, its neighbours), filled as the search reaches it
+
+    # reservations
+    def _reserve(self, drone, cells, t0):
+        prev = None
+        for t, cell in enumerate(cells, t0):
+            if self.exclusive[cell]:
+                self._res[cell][t] = drone
+                self._by_tick[t].append((cell, None))
+            if prev is not None and prev != cell:
+                self._edges[(prev, cell, t)] = drone
+                self._by_tick[t].append((prev, cell))
+            prev = cell
+        if self.exclusive[cells[-1]]:
+            self._parked[cells[-1]] = (drone, t0 + len(cells) - 1)
+
+    def release(self, drone):
+        """Forget a drone's reservations (e.g. it was reset or removed)."""
+        plan = self._plans.pop(drone, None)
+        if plan is None:
+            return None
+        prev = None
+        for t, cell in enumerate(plan["cells"], plan["t0"]):
+            if self._res.get(cell, {}).get(t) == drone:
+                del self._res[cell][t]
+            if prev is not None and self._edges.get((prev, cell, t)) == drone:
+                del self._edges[(prev, cell, t)]
+            prev = cell
+        last = plan["cells"][-1]
+        if self._parked.get(last, (None,))[0] == drone:
+            del self._parked[last]
+        return plan
+
+    def prune(self, tick):
+        """Drop reservations older than tick; call once per simulation tick."""
+        for t in [t for t in self._by_tick if t < tick]:
+            for a, b in self._by_tick.pop(t):
+                if b is None:
+                    self._res[a].pop(t, None)
+                else:
+                    self._edges.pop((a, b, t), None)
+
+    def _free(self, drone, frm, to, t, cons):
+        if cons and (("v", to, t) in cons or ("e", frm, to, t) in cons):
+            return False
+        if self.exclusive[to]:
+            other = self._res.get(to, {}).get(t)
+            if other is not None and other != drone:
+                return False
+            parked = self._parked.get(to)
+            if parked and parked[0] != drone and t >= parked[1]:
+                return False
+        if frm != to and (self.exclusive[to] or self.exclusive[frm]):
+            other = self._edges.get((to, frm, t))
+            if other is not None and other != drone:
+                return False
+        return True
+
+    def _can_park(self, drone, cell, t):
+        # an exclusive final cell must stay free for good once we arrive
+        if not self.exclusive[cell]:
+            return True
+        return all(o == drone for tt, o in self._res.get(cell, {}).items() if tt >= t)
+
+    # search
+    def _heuristic(self, goal):
+        if self.routes.covers(goal):
+            field = self._fields.get(goal)
+            if field is None:
+                field = self.routes.distance_field(self.grid, goal).tolist()
+                self._fields[goal] = field
+            cols = self.grid.shape[1]
+            return lambda cell: None if field[cell[0] * cols + cell[1]] < 0 else field[cell[0] * cols + cell[1]]
+        return lambda cell: abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+    def _neighbors(self, cell):
+        # waiting in place, then each open neighbour
+        moves = self._moves.get(cell)
+        if moves is None:
+            cols = self.grid.shape[1]
+            moves = (cell,) + tuple(divmod(n, cols) for n in self._table.neighbors(cell[0] * cols + cell[1]).tolist())
+            self._moves[cell] = moves
+        return moves
+
+    def _leg(self, drone, start, goal, t0, cons, final, free=True):
+        # space-time A*; returns the cells for ticks t0+1 .. arrival
+        h = self._heuristic(goal)
+        h0 = h(start)
+        if h0 is None:
+            return None
+        limit = t0 + h0 + self.max_wait
+        parent = {(start, t0): None}
+        heap = [(t0 + h0, -t0, start)]
+        while heap:
+            _, neg_t, cell = heapq.heappop(heap)
+            t = -neg_t
+            if cell == goal and (not free or not final or self._can_park(drone, cell, t)):
+                out = []
+                node = (cell, t)
+                while node[1] != t0:
+                    out.append(node[0])
+                    node = parent[node]
+                return out[::-1]
+            nt = t + 1
+            for nxt in self._neighbors(cell):
+                if (nxt, nt) in parent:
+                    continue
+                hn = h(nxt)
+                if hn is None or nt + hn > limit:
+                    continue
+                if free and not self._free(drone, cell, nxt, nt, cons):
+                    continue
+                if not free and cons and (("v", nxt, nt) in cons or ("e", cell, nxt, nt) in cons):
+                    continue
+                parent[(nxt, nt)] = (cell, t)
+                heapq.heappush(heap, (nt + hn, -nt, nxt))
+        return None
+
+    def _route(self, drone, start, goals, t0, cons=None, free=True):
+        path, legs = [], []
+        cur, t = start, t0
+        for i, goal in enumerate(goals):
+            leg = self._leg(drone, cur, tuple(goal), t, cons, i == len(goals) - 1, free)
+            if leg is None:
+                return None, None
+            path += leg
+            t += len(leg)
+            cur = tuple(goal)
+            legs.append((cur, t))
+        return path, legs
+
+    def _commit(self, drone, start, path, legs, t0):
+        cells = [start] + path
+        self._plans[drone] = {"t0": t0, "cells": cells, "legs": legs}
+        self._reserve(drone, cells, t0)
+
+    # public api
+    def plan(self, drone, start, goals, tick):
+        """
+        Plan drone from start through each goal in order, starting at tick.
+        Returns the path, or None (keeping the old plan) if no collision-free
+        route was found.
+        Other drones moved by a CBS repair are left in self.replanned.
+        """
+        start = tuple(int(v) for v in start)
+        goals = [tuple(g) for g in goals]
+        saved = self.release(drone)
+        path, legs = self._route(drone, start, goals, tick)
+        if path is None:
+            path, legs = self._repair(drone, start, goals, tick)
+            if path is None:
+                # keep the old plan so the drone's cells stay reserved
+                if saved is not None:
+                    self._plans[drone] = saved
+                    self._reserve(drone, saved["cells"], saved["t0"])
+                return None
+        self._commit(drone, start, path, legs, tick)
+        return path
+
+    def hold(self, drone, cell, tick):
+        """
+        Park drone at cell from tick on, whatever else is reserved there.
+        Returns the other drones whose plans now run into it; they need replanning.
+        """
+        cell = tuple(int(v) for v in cell)
+        self.release(drone)
+        blocked = set()
+        if self.exclusive[cell]:
+            blocked = {o for t, o in self._res.get(cell, {}).items() if t > tick and o != drone}
+        self._commit(drone, cell, [cell], [], tick)
+        return blocked
+
+    def remaining_goals(self, drone, tick):
+        """Goals of drone's current plan it hasn't reached by tick."""
+        plan = self._plans.get(drone)
+        return [] if plan is None else [g for g, ta in plan["legs"] if ta > tick]
+
+    def take_replanned(self):
+        out, self.replanned = self.replanned, {}
+        return out
+
+    # conflict-based search fallback
+    def _position(self, plan, t):
+        cells = plan["cells"]
+        i = t - plan["t0"]
+        return cells[min(max(i, 0), len(cells) - 1)]
+
+    def _blockers(self, drone, start, goals, tick):
+        # drones holding reservations on the route we would take with the hallways empty
+        path, _ = self._route(drone, start, goals, tick, free=False)
+        if path is None:
+            return None
+        found = set()
+        for t, cell in enumerate(path, tick + 1):
+            if not self.exclusive[cell]:
+                continue
+            for tt in range(t - 1, t + self.max_wait):
+                other = self._res.get(cell, {}).get(tt)
+                if other is not None and other != drone:
+                    found.add(other)
+            parked = self._parked.get(cell)
+            if parked and parked[0] != drone:
+                found.add(parked[0])
+        return found
+
+    def _repair(self, drone, start, goals, tick):
+        blockers = self._blockers(drone, start, goals, tick)
+        if not blockers or len(blockers) + 1 > self.cbs_limit:
+            return None, None
+        group = {drone: (start, goals)}
+        for other in blockers:
+            plan = self._plans[other]
+            remaining = [g for g, ta in plan["legs"] if ta > tick]
+            if not remaining:
+                return None, None  # parked for good, nothing to replan
+            group[other] = (self._position(plan, tick), remaining)
+
+        saved = {o: self.release(o) for o in blockers}
+        solution = self._cbs(group, tick)
+        if solution is None:
+            for o, plan in saved.items():
+                self._plans[o] = plan
+                self._reserve(o, plan["cells"], plan["t0"])
+            return None, None
+        for o in blockers:
+            path, legs = solution[o]
+            self._commit(o, group[o][0], path, legs, tick)
+            self.replanned[o] = path
+        return solution[drone]
+
+    def _first_conflict(self, group, solution, tick):
+        pos = {}
+        for a, (path, _) in solution.items():
+            pos[a] = [group[a][0]] + path
+        end = max(len(p) for p in pos.values())
+        agents = list(pos)
+        for i in range(1, end + 1):
+            t = tick + i
+            at = {a: p[min(i, len(p) - 1)] for a, p in pos.items()}
+            before = {a: p[min(i - 1, len(p) - 1)] for a, p in pos.items()}
+            for a, b in itertools.combinations(agents, 2):
+                if at[a] == at[b] and self.exclusive[at[a]]:
+                    return (a, ("v", at[a], t)), (b, ("v", at[b], t))
+                if at[a] == before[b] and at[b] == before[a] and at[a] != at[b] \
+                        and (self.exclusive[at[a]] or self.exclusive[at[b]]):
+                    return (a, ("e", before[a], at[a], t)), (b, ("e", before[b], at[b], t))
+        return None
+
+    def _cbs(self, group, tick):
+        solution = {}
+        for a, (start, goals) in group.items():
+            path, legs = self._route(a, start, goals, tick)
+            if path is None:
+                return None
+            solution[a] = (path, legs)
+        counter = itertools.count()
+        cost = sum(len(p) for p, _ in solution.values())
+        heap = [(cost, next(counter), {a: frozenset() for a in group}, solution)]
+        for _ in range(self.cbs_expansions):
+            if not heap:
+                return None
+            _, _, cons, solution = heapq.heappop(heap)
+            conflict = self._first_conflict(group, solution, tick)
+            if conflict is None:
+                return solution
+            for a, con in conflict:
+                child = dict(cons)
+                child[a] = cons[a] | {con}
+                start, goals = group[a]
+                path, legs = self._route(a, start, goals, tick, child[a])
+                if path is None:
+                    continue
+                new = dict(solution)
+                new[a] = (path, legs)
+                cost = sum(len(p) for p, _ in new.values())
+                heapq.heappush(heap, (cost, next(counter), child, new))
+        return None
@@ -0,0 +1,234 @@
+import heapq
+import itertools
+import numpy as np
+import backend
+import grid as map_data
+import logic
+import routing
+from simulation import DRONE_INIT
+
+# event kinds
+REQUEST = "request"
+DISPATCH = "dispatch"
+ARRIVAL = "arrival"
+BATTERY_LOW = "battery_low"
+RETURNED = "returned"
+CHARGED = "charged"
+
+# within one tick the step() order is: new requests, dispatch, then drone updates
+PHASE = {REQUEST: 0, DISPATCH: 1, ARRIVAL: 2, BATTERY_LOW: 2, RETURNED: 2, CHARGED: 2}
+
+
+def hub_region(grid, hub):
+    """
+    Cells that count as "in the hub": the whole room the hub cell is in,
+    or just the hub cell itself if it was placed on a hallway.
+    """
+    mask = np.zeros(grid.shape, dtype=bool)
+    kind = grid[hub]
+    if kind == map_data.ID_HALLWAY:
+        mask[hub] = True
+        return mask
+    rows, cols = grid.shape
+    stack = [hub]
+    mask[hub] = True
+    while stack:
+        r, c = stack.pop()
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < rows and 0 <= nc < cols and not mask[nr, nc] and grid[nr, nc] == kind:
+                mask[nr, nc] = True
+                stack.append((nr, nc))
+    return mask
+
+
+class EventSimulation:
+    """
+    Discrete-event version of Simulation.
+
+    Paths are known when a drone is dispatched, so arrival tick and battery
+    at arrival follow directly from the path length and
+    backend.weight_to_multiplier. Instead of stepping every tick we jump
+    between events (request, dispatch, arrival, battery low, returned,
+    charge complete), reproducing Simulation.step()'s timing: a tick runs
+    new requests, then dispatch, then drone updates.
+
+    The dispatcher is the dashboard's original one: each queued task goes
+    to the first idle drone above `threshold`, with no min-cost matching,
+    no energy admission, no recall of drones too low for the queue and no
+    charging bays, and drones do not wait for each other (no reservation
+    table). Battery can run below zero on heavy payloads. Delivery ticks
+    therefore differ from Simulation's even with a single drone; use
+    fleet.Fleet for a fast run of Simulation's dispatcher.
+
+    threshold, charge_rate and hub default to the dashboard's 30%, +2.0/tick
+    and TARGETS["Hub"]; a custom hub starts every drone on the hub cell.
+    """
+    def __init__(self, grid=None, n_drones=3, drone_init=None, routes=None,
+                 threshold=30, charge_rate=2.0, hub=None):
+        self.grid = map_data.create_floor_plan() if grid is None else grid
+        self.threshold = threshold
+        self.charge_rate = charge_rate
+        self.hub = tuple(map_data.TARGETS["Hub"] if hub is None else hub)
+        if self.grid[self.hub] == map_data.ID_WALL:
+            raise ValueError(f"hub {self.hub} is inside a wall")
+        self.hub_mask = hub_region(self.grid, self.hub)
+        if routes is None:
+            routes = routing.RouteCache(dict(map_data.TARGETS, Hub=self.hub))
+        self.routes = routes
+        self.tasks = logic.TriageQueue()
+        self.tick = 0
+        self.events = []
+        self._seq = itertools.count()
+        self._dispatch_ticks = set()
+        self.processed = 0
+        self.completed = []   # one dict per delivered task
+        self.logs = []
+
+        if drone_init is None and hub is not None:
+            drone_init = [self.hub] * n_drones
+        elif drone_init is None:
+            cells = list(zip(*self.hub_mask.nonzero()))
+            drone_init = [DRONE_INIT[i] if i < len(DRONE_INIT) else cells[i % len(cells)] for i in range(n_drones)]
+        self.drones = [
+            {"id": f"D{i+1}", "pos": (int(r), int(c)), "bat": 100.0, "mult": 1.0,
+             "status": "IDLE", "free_at": 0, "task": None}
+            for i, (r, c) in enumerate(drone_init)
+        ]
+
+    # scheduling
+    def schedule(self, tick, kind, payload=None):
+        heapq.heappush(self.events, (tick, PHASE[kind], next(self._seq), kind, payload))
+
+    def _schedule_dispatch(self, tick):
+        if tick not in self._dispatch_ticks:
+            self._dispatch_ticks.add(tick)
+            self.schedule(tick, DISPATCH)
+
+    def submit(self, task, tick=None):
+        """Queue a request at tick (default: now). task needs the usual payload keys."""
+        self.schedule(self.tick if tick is None else tick, REQUEST, task)
+
+    def in_hub(self, pos):
+        return self.hub_mask[pos]
+
+    # run
+    def run(self, until):
+        """Process every event up to and including tick `until`."""
+        while self.events and self.events[0][0] <= until:
+            tick, _, _, kind, payload = heapq.heappop(self.events)
+            self.tick = tick
+            self.processed += 1
+            getattr(self, "_on_" + kind)(payload)
+        self.tick = max(self.tick, until)
+
+    def run_until_idle(self):
+        while self.events:
+            self.run(self.events[0][0])
+
+    # handlers
+    def _on_request(self, task):
+        task = dict(task)
+        task["request_tick"] = self.tick
+        self.tasks.push(task)
+        self._schedule_dispatch(self.tick)
+
+    def _on_dispatch(self, _):
+        t = self.tick
+        self._dispatch_ticks.discard(t)
+        avail = [d for d in self.drones if d['status'] == 'IDLE' and d['free_at'] <= t and d['bat'] > self.threshold]
+        hub = self.hub
+        while self.tasks and avail:
+            task = self.tasks.pop()
+            d = avail.pop(0)
+            target = tuple(map_data.TARGETS[task['target']])
+
+            if self.routes.distance(self.grid, d['pos'], target) is None:
+                self.logs.append(f"Path failed for {task['target']}")
+                self._schedule_dispatch(t + 1)
+                continue
+            steps = 0
+            if not self.in_hub(d['pos']):
+                steps += self.routes.distance(self.grid, d['pos'], hub)
+                steps += self.routes.distance(self.grid, hub, target)
+            else:
+                steps += self.routes.distance(self.grid, d['pos'], target)
+
+            mult = backend.weight_to_multiplier(task['weight'])
+            if mult is not None:
+                d['mult'] = mult
+            d['status'] = "DELIVERING"
+            d['task'] = (task, t)
+            d['pos'] = target
+            d['bat'] = self._drain(d['bat'], d['mult'], steps)
+            self.logs.append(f"{d['id']} dispatched -> {task['target']}")
+            # moves happen on ticks t .. t+steps-1, the drone notices on t+steps
+            self.schedule(t + steps, ARRIVAL, d)
+
+    def _drain(self, bat, mult, steps):
+        # one subtraction per step, so the float matches the tick-by-tick sims
+        per_step = 0.5 * mult
+        for _ in range(steps):
+            bat -= per_step
+        return bat
+
+    def _on_arrival(self, d):
+        t = self.tick
+        task, dispatched = d['task']
+        d['task'] = None
+        d['status'] = "IDLE"
+        d['mult'] = 1.0
+        self.completed.append({"id": task['id'], "request": task['request_tick'], "dispatch": dispatched,
+                               "delivered": t, "drone": d['id'], "bat": d['bat']})
+        self.logs.append(f"{d['id']} Arrived at Destination.")
+        self._after_idle(d, t)
+
+    def _after_idle(self, d, t):
+        # what an idle drone does from the next tick on
+        if self.in_hub(d['pos']):
+            if d['bat'] < 100:
+                self._start_charging(d, t)
+                return
+        elif d['bat'] < self.threshold:
+            self.schedule(t + 1, BATTERY_LOW, d)
+            return
+        d['free_at'] = t + 1
+        if self.tasks:
+            self._schedule_dispatch(t + 1)
+
+    def _on_battery_low(self, d):
+        t = self.tick
+        hub = self.hub
+        steps = self.routes.distance(self.grid, d['pos'], hub)
+        if steps is None:
+            return  # stranded, same as the tick sim retrying forever
+        d['status'] = "RETURNING"
+        d['bat'] = self._drain(d['bat'], d['mult'], steps)
+        d['pos'] = tuple(hub)
+        self.logs.append(f"{d['id']} Battery Low (<{self.threshold}% remaining). Returning to hub.")
+        self.schedule(t + 1 + steps, RETURNED, d)
+
+    def _on_returned(self, d):
+        d['status'] = "IDLE"
+        self.logs.append(f"{d['id']} Returned to Base.")
+        self._after_idle(d, self.tick)
+
+    def _start_charging(self, d, t):
+        # +charge_rate per tick from t+1 until full, IDLE again on the tick after that
+        bat, ticks = d['bat'], 0
+        while bat < 100:
+            bat = min(100, bat + self.charge_rate)
+            ticks += 1
+        d['status'] = "CHARGING"
+        d['bat'] = bat
+        self.schedule(t + ticks + 1, CHARGED, d)
+
+    def _on_charged(self, d):
+        d['status'] = "IDLE"
+        d['free_at'] = self.tick + 1
+        if self.tasks:
+            self._schedule_dispatch(self.tick + 1)
+
+    # stats
+    def latencies(self):
+        """Request-to-delivery ticks for every completed task."""
+        return np.array([c["delivered"] - c["request"] for c in self.completed])
@@ -0,0 +1,96 @@
+import numpy as np
+import backend
+import grid as map_data
+
+DRAIN = 0.5  # battery % per step at multiplier 1.0 (backend.Drone.update)
+
+
+class EnergyTable:
+    """
+    Battery a delivery needs, looked up by (origin region, target, weight class).
+
+    Origin regions are the floor plan's cell types (hub, each room, hallway).
+    An entry is the worst case over the region's cells: out to the target
+    (via the hub unless already in it) at the payload's multiplier, then
+    back to the hub empty, plus `reserve` for waits and detours. Step counts
+    come from the RouteCache distance fields and are rebuilt whenever the
+    cache is; energy arrays are filled once per weight class
+    (backend.weight_to_multiplier tier), so every check is a table lookup.
+    """
+    def __init__(self, routes, hub=None, reserve=5.0):
+        self.routes = routes
+        self.hub = tuple(map_data.TARGETS["Hub"] if hub is None else hub)
+        self.reserve = reserve
+        self.targets = {name: i for i, name in enumerate(routes.targets)}
+        self._hub = next(i for name, i in self.targets.items() if tuple(routes.targets[name]) == self.hub)
+        self._version = None
+        self.out_steps = None   # (regions, targets), -1 = unreachable
+        self.back_steps = None  # (targets,) target -> hub, -1 = unreachable
+        self._energy = {}       # multiplier -> (regions, targets) battery %, inf = unreachable
+
+    def build(self, grid):
+        routes = self.routes
+        flat = np.asarray(grid).ravel()
+        cols = grid.shape[1]
+        hub_field = routes.distance_field(grid, self.hub)
+        in_hub = flat == map_data.ID_HUB
+        n_regions = int(flat.max()) + 1
+
+        out = np.full((n_regions, len(self.targets)), -1, dtype=np.int64)
+        back = np.full(len(self.targets), -1, dtype=np.int64)
+        hub_idx = self.hub[0] * cols + self.hub[1]
+        for name, t in self.targets.items():
+            r, c = routes.targets[name]
+            field = routes.distance_field(grid, (r, c))
+            back[t] = hub_field[r * cols + c]
+            via_hub = np.where((hub_field >= 0) & (field[hub_idx] >= 0), hub_field + field[hub_idx], -1)
+            steps = np.where(in_hub, field, via_hub)
+            for region in range(n_regions):
+                if region == map_data.ID_WALL:
+                    continue
+                cells = steps[flat == region]
+                cells = cells[cells >= 0]
+                if cells.size:
+                    out[region, t] = cells.max()
+
+        self.out_steps = out
+        self.back_steps = back
+        self._energy = {}
+        self._version = routes.version
+
+    def _ensure(self, grid):
+        self.routes.distance_field(grid, self.hub)  # rebuilds the route tables if the grid changed
+        if self._version != self.routes.version:
+            self.build(grid)
+
+    def energy(self, grid, mult):
+        """(regions, targets) battery needed at one payload multiplier."""
+        self._ensure(grid)
+        table = self._energy.get(mult)
+        if table is None:
+            ok = (self.out_steps >= 0) & (self.back_steps >= 0)
+            table = np.where(ok, DRAIN * (mult * self.out_steps + self.back_steps) + self.reserve, np.inf)
+            self._energy[mult] = table
+        return table
+
+    def _need(self, grid, regions, task):
+        self._ensure(grid)
+        # too heavy to load means the drone flies empty, same as the dispatcher
+        mult = backend.weight_to_multiplier(task['weight']) or 1.0
+        if 'stops' in task:
+            # a tour carries its own cost from the hub (tours.TourPlanner.evaluate)
+            steps = self.out_steps[regions, self._hub]
+            return np.where(steps >= 0, DRAIN * mult * steps + task['energy'] + self.reserve, np.inf)
+        return self.energy(grid, mult)[regions, self.targets[task['target']]]
+
+    def required(self, grid, pos, task):
+        """Battery % needed to deliver from pos and get back to the hub (inf if unreachable)."""
+        return self._need(grid, grid[int(pos[0]), int(pos[1])], task)
+
+    def required_matrix(self, grid, positions, tasks):
+        """required() for every (drone position, task) pair."""
+        regions = np.array([grid[int(r), int(c)] for r, c in positions], dtype=np.int64)
+        need = np.empty((len(regions), len(tasks)))
+        for j, task in enumerate(tasks):
+            need[:, j] = self._need(grid, regions, task)
+        return need
@@ -0,0 +1,153 @@
+import os
+import glob
+import json
+from collections import deque, namedtuple
+
+# event kinds
+DISPATCH = "DISPATCH"
+PATH_FAILED = "PATH_FAILED"
+RETURNING = "RETURNING"      # detail = why
+DROP = "DROP"                # detail = item left at an intermediate tour stop
+DELIVERY = "DELIVERY"
+RETURNED = "RETURNED"
+CLOSED = "CLOSED"            # detail = how many cells
+REOPENED = "REOPENED"
+REROUTED = "REROUTED"
+KINDS = (DISPATCH, PATH_FAILED, RETURNING, DROP, DELIVERY, RETURNED, CLOSED, REOPENED, REROUTED)
+
+# the dashboard's log lines
+TEXT = {
+    DISPATCH: "{drone} dispatched -> {target}",
+    PATH_FAILED: "Path failed for {target}",
+    RETURNING: "{drone} {detail}",
+    DROP: "{drone} dropped {detail} at {target}.",
+    DELIVERY: "{drone} Arrived at Destination.",
+    RETURNED: "{drone} Returned to Base.",
+    CLOSED: "Hallway closed ({detail}).",
+    REOPENED: "Hallway reopened ({detail}).",
+    REROUTED: "{drone} rerouted around a closure.",
+}
+
+
+class Event(namedtuple("Event", "tick kind drone target detail")):
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return TEXT.get(self.kind, "{kind} {drone} {target} {detail}").format(**self._asdict())
+
+
+class EventLog:
+    """
+    Bounded in-memory event log with typed records.
+
+    Holds the newest `capacity` events. When it fills up the oldest
+    `capacity // 4` are written out together as JSON lines to a segment
+    file in `spill_dir` (or dropped if there is none); a segment is closed
+    after `segment_events` events and only the newest `max_segments`
+    closed segments are kept besides the open one. Per-drone and per-kind
+    indexes over the in-memory events make query() cheap; history() reads
+    the spilled segments as well.
+    """
+    def __init__(self, capacity=1000, spill_dir=None, segment_events=50000, max_segments=8):
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+        self.segment_events = segment_events
+        self.max_segments = max_segments
+        self.events = deque()
+        self.by_drone = {}
+        self.by_kind = {}
+        self.total = 0      # events ever added
+        self.spilled = 0    # events written to disk
+        self._segment = 0
+        self._in_segment = 0
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def add(self, tick, kind, drone=None, target=None, detail=None):
+        event = Event(int(tick), kind, drone, target, detail)
+        self.events.append(event)
+        if drone is not None:
+            self.by_drone.setdefault(drone, deque()).append(event)
+        self.by_kind.setdefault(kind, deque()).append(event)
+        self.total += 1
+        if len(self.events) > self.capacity:
+            self._evict(max(1, self.capacity // 4))
+        return event
+
+    def query(self, drone=None, kind=None, limit=None):
+        """In-memory events for a drone and/or kind, newest first."""
+        if drone is not None and kind is not None:
+            a, b = self.by_drone.get(drone, ()), self.by_kind.get(kind, ())
+            pool = a if len(a) <= len(b) else b
+        elif drone is not None:
+            pool = self.by_drone.get(drone, ())
+        elif kind is not None:
+            pool = self.by_kind.get(kind, ())
+        else:
+            pool = self.events
+        out = []
+        for event in reversed(pool):
+            if (drone is None or event.drone == drone) and (kind is None or event.kind == kind):
+                out.append(event)
+                if limit is not None and len(out) >= limit:
+                    break
+        return out
+
+    def history(self, drone=None, kind=None):
+        """Every retained event (spilled segments, then memory), oldest first."""
+        for path in self.segments():
+            with open(path) as f:
+                for line in f:
+                    event = Event(*json.loads(line))
+                    if (drone is None or event.drone == drone) and (kind is None or event.kind == kind):
+                        yield event
+        for event in list(self.events):
+            if (drone is None or event.drone == drone) and (kind is None or event.kind == kind):
+                yield event
+
+    def segments(self):
+        if self.spill_dir is None:
+            return []
+        return sorted(glob.glob(os.path.join(self.spill_dir, "events-*.jsonl")))
+
+    def _evict(self, n):
+        old = [self.events.popleft() for _ in range(min(n, len(self.events)))]
+        for event in old:
+            # the oldest event is also the oldest in its index deques
+            if event.drone is not None:
+                self._unindex(self.by_drone, event.drone)
+            self._unindex(self.by_kind, event.kind)
+        if self.spill_dir is not None:
+            self._spill(old)
+
+    def _unindex(self, index, key):
+        members = index[key]
+        members.popleft()
+        if not members:
+            del index[key]
+
+    def _spill(self, events):
+        while events:
+            room = self.segment_events - self._in_segment
+            chunk, events = events[:room], events[room:]
+            path = os.path.join(self.spill_dir, f"events-{self._segment:06d}.jsonl")
+            with open(path, "a") as f:
+                f.writelines(json.dumps(list(e)) + "\n" for e in chunk)
+            self.spilled += len(chunk)
+            self._in_segment += len(chunk)
+            if self._in_segment >= self.segment_events:
+                self._segment += 1
+                self._in_segment = 0
+                self._rotate()
+
+    def _rotate(self):
+        old = self.segments()
+        for path in old[:max(0, len(old) - self.max_segments)]:
+            os.remove(path)
@@ -0,0 +1,232 @@
+import numpy as np
+import backend
+import grid as map_data
+import logic
+import routing
+import assignment
+import energy
+
+# drone status codes, shared by the trace format and anything reading it
+IDLE = 0
+CHARGING = 1
+DELIVERING = 2
+RETURNING = 3
+STATUS_NAMES = ("IDLE", "CHARGING", "DELIVERING", "RETURNING")
+
+# up to this many available drones, dispatch considers all of them (as simulation.NEAREST_SCAN)
+NEAREST_SCAN = 64
+
+
+class Fleet:
+    """
+    Struct-of-arrays fleet for fleet-sizing studies with thousands of drones.
+
+    Same dispatcher and tick rules as Simulation: min-cost matching of idle
+    drones to the top of the triage queue with energy admission, idle
+    drones out in the building that can't afford any queued task fly home,
+    then move one cell, drain 0.5 * multiplier, +charge_rate in the hub
+    until full and return under `threshold`. Positions, battery,
+    multiplier, status and path cursor live in NumPy arrays and every tick
+    rule is one vectorized operation. Routes come from RouteCache and are
+    stored as rows of flat cell indices.
+
+    There is no collision avoidance between drones, so this matches
+    Simulation tick for tick only while its drones never wait for or
+    detour around each other (always, with one drone). Tours, staging and charging bays are
+    not modelled: every drone charges at once, to full.
+    """
+    def __init__(self, n_drones, grid=None, start=None, routes=None, threshold=30.0, charge_rate=2.0):
+        self.grid = map_data.create_floor_plan() if grid is None else grid
+        self.cols = self.grid.shape[1]
+        self.routes = routes if routes is not None else routing.RouteCache()
+        self.energy = energy.EnergyTable(self.routes)
+        self.hub_mask = (self.grid == map_data.ID_HUB).ravel()
+        self.threshold = threshold
+        self.charge_rate = charge_rate
+
+        if start is None:
+            hub = np.flatnonzero(self.hub_mask)
+            start = hub[np.arange(n_drones) % len(hub)]
+        self.pos = np.asarray(start, dtype=np.int64).copy()     # flat cell index
+        self.battery = np.full(n_drones, 100.0)
+        self.multiplier = np.ones(n_drones)
+        self.status = np.full(n_drones, IDLE, dtype=np.int8)
+        self.cursor = np.zeros(n_drones, dtype=np.int64)
+        self.length = np.zeros(n_drones, dtype=np.int64)
+        self.route = np.zeros((n_drones, 32), dtype=np.int64)
+
+        self.tasks = logic.TriageQueue()
+        self.carrying = [None] * n_drones  # task each drone is delivering
+        self.completed = []  # one dict per delivered task, as Simulation.completed
+        self.tick = 0
+        self.co2_saved = 0.0
+
+    def __len__(self):
+        return len(self.pos)
+
+    def submit(self, task):
+        self.tasks.push(dict(task, request_tick=self.tick))
+
+    # routes
+    def _ensure_width(self, width):
+        if width > self.route.shape[1]:
+            grown = np.zeros((len(self.pos), max(width, 2 * self.route.shape[1])), dtype=np.int64)
+            grown[:, :self.route.shape[1]] = self.route
+            self.route = grown
+
+    def _walk(self, starts, target):
+        # all drones step along the next-hop table together; the target points to itself
+        dist = self.routes.distance_field(self.grid, target)[starts]
+        hop = self.routes.next_hop_field(self.grid, target)
+        steps = np.empty((len(starts), max(int(dist.max(initial=0)), 0)), dtype=np.int64)
+        cur = starts
+        for j in range(steps.shape[1]):
+            cur = hop[cur]
+            steps[:, j] = cur
+        return steps, dist
+
+    def set_path(self, idx, cells, status, multiplier=1.0):
+        """Give drones idx a route of flat cells (one row per drone, padded) and a status."""
+        idx = np.atleast_1d(idx)
+        cells = np.atleast_2d(cells)
+        self._ensure_width(cells.shape[1])
+        self.route[idx, :cells.shape[1]] = cells
+        self.cursor[idx] = 0
+        self.length[idx] = cells.shape[1]
+        self.status[idx] = status
+        self.multiplier[idx] = multiplier
+
+    def _return_to_hub(self, idx):
+        steps, dist = self._walk(self.pos[idx], map_data.TARGETS["Hub"])
+        ok = dist >= 0
+        idx, steps, dist = idx[ok], steps[ok], dist[ok]
+        self.set_path(idx, steps, RETURNING)
+        self.length[idx] = dist
+
+    # dispatch
+    def _nearby(self, avail, candidates):
+        # a task's best drone is among its len(candidates) nearest by travel (via the hub
+        # unless in it), so big fleets only need those per target
+        if len(avail) <= NEAREST_SCAN:
+            return avail
+        hub = map_data.TARGETS["Hub"]
+        pos = self.pos[avail]
+        in_hub = self.hub_mask[pos]
+        to_hub = self.routes.distance_field(self.grid, hub)[pos].astype(float)
+        to_hub[to_hub < 0] = np.inf
+        k = min(len(candidates), len(avail))
+        picked = set()
+        for name in {t['target'] for t in candidates}:
+            field = self.routes.distance_field(self.grid, map_data.TARGETS[name]).astype(float)
+            field[field < 0] = np.inf
+            travel = np.where(in_hub, field[pos], to_hub + field[hub[0] * self.cols + hub[1]])
+            picked.update(avail[np.argpartition(travel, k - 1)[:k]].tolist())
+        return np.array(sorted(picked), dtype=np.int64)
+
+    def _send(self, i, task):
+        """Route drone i via the hub to task's target."""
+        hub = map_data.TARGETS["Hub"]
+        start = divmod(int(self.pos[i]), self.cols)
+        target = map_data.TARGETS[task['target']]
+        legs = []
+        if not self.hub_mask[self.pos[i]]:
+            legs += self.routes.path(self.grid, start, hub)
+            start = hub
+        legs += self.routes.path(self.grid, start, target)
+        cells = [r * self.cols + c for r, c in legs]
+        # too heavy to load means the drone flies empty, as backend.Drone.load_supply
+        mult = backend.weight_to_multiplier(task['weight']) or 1.0
+        self.set_path(i, [cells], DELIVERING, mult)
+        self.carrying[i] = task
+
+    def _dispatch(self):
+        if not self.tasks:
+            return
+        avail = np.flatnonzero((self.status == IDLE) & (self.battery > self.threshold))
+        if not avail.size:
+            return
+
+        n_cand = min(len(self.tasks), len(avail) * assignment.CANDIDATES_PER_DRONE)
+        candidates = [self.tasks.pop() for _ in range(n_cand)]
+        avail = self._nearby(avail, candidates)
+        positions = [divmod(int(p), self.cols) for p in self.pos[avail]]
+        cost = assignment.dispatch_costs(self.grid, self.routes, positions, candidates)
+
+        # never send a drone on a trip it can't finish and fly home from
+        need = self.energy.required_matrix(self.grid, positions, candidates)
+        lost = ((cost >= assignment.UNREACHABLE) | ~np.isfinite(need)).all(axis=0)
+        short = need > self.battery[avail][:, None]
+        cost[short] = assignment.UNREACHABLE
+        rows, cols = assignment.priority_assignment(cost)
+
+        # targets no drone can reach and fly home from are dropped
+        leftover = set(range(n_cand)) - set(cols.tolist()) - set(np.flatnonzero(lost).tolist())
+        for j, r in sorted(zip(cols.tolist(), rows.tolist())):
+            self._send(avail[r], candidates[j])
+        for j in sorted(leftover):
+            self.tasks.push(candidates[j])
+
+        # idle drones out in the building that can't afford any waiting task go charge
+        home = avail[short.all(axis=1) & (self.status[avail] == IDLE) & ~self.hub_mask[self.pos[avail]]]
+        if home.size:
+            self._return_to_hub(home)
+
+    # tick
+    def step(self, n=1):
+        for _ in range(n):
+            self._tick()
+
+    def _tick(self):
+        # same order as Simulation.step: recall, dispatch, then drone updates
+        resting = self.cursor >= self.length
+        low = np.flatnonzero(resting & ((self.status == IDLE) | (self.status == CHARGING))
+                             & ~self.hub_mask[self.pos] & (self.battery < self.threshold))
+        if low.size:
+            self._return_to_hub(low)
+        self._dispatch()
+
+        status = self.status.copy()
+        moving = self.cursor < self.length
+
+        # movement and drain
+        idx = np.flatnonzero(moving)
+        if idx.size:
+            nxt = self.route[idx, self.cursor[idx]]
+            moved = idx[nxt != self.pos[idx]]
+            self.battery[moved] -= 0.5 * self.multiplier[moved]
+            self.pos[idx] = nxt
+            self.cursor[idx] += 1
+            self.co2_saved += 0.05 * moved.size
+
+        rest = ~moving
+        in_hub = self.hub_mask[self.pos]
+
+        # arrivals
+        delivered = rest & (status == DELIVERING)
+        self.status[delivered] = IDLE
+        self.multiplier[delivered] = 1.0
+        for i in np.flatnonzero(delivered):
+            task = self.carrying[i]
+            self.carrying[i] = None
+            self.completed.append({"id": task['id'], "request": task['request_tick'], "delivered": self.tick,
+                                   "drone": f"D{i+1}"})
+        self.status[rest & (status == RETURNING)] = IDLE
+
+        # charging
+        waiting = rest & ((status == IDLE) | (status == CHARGING))
+        charge = waiting & in_hub & (self.battery < 100)
+        full = waiting & in_hub & (self.battery >= 100)
+        self.battery[charge] = np.minimum(100.0, self.battery[charge] + self.charge_rate)
+        self.status[charge] = CHARGING
+        self.status[full] = IDLE
+
+        self.tick += 1
+
+    # stats
+    def latencies(self):
+        """Request-to-delivery ticks for every completed task."""
+        return np.array([c["delivered"] - c["request"] for c in self.completed])
+
+    def status_counts(self):
+        counts = np.bincount(self.status, minlength=len(STATUS_NAMES))
+        return dict(zip(STATUS_NAMES, counts.tolist()))
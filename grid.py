@@ -1,3 +1,5 @@
+import os
+import json
 import numpy as np
 GRID_SIZE = 20
 
@@ -51,9 +53,15 @@ LABELS = [
     {"x": 15, "y": 18, "txt": "OR"},
 ]
 
+# floor plan loaded from disk, if any (see use_floor_plan)
+_PLAN = None
+
 # map
 def create_floor_plan():
-    grid = np.ones((GRID_SIZE, GRID_SIZE), dtype=int) * ID_WALL
+    if _PLAN is not None:
+        return _PLAN.open()
+    # uint8 cell codes, the same as a floor plan loaded from disk
+    grid = np.full((GRID_SIZE, GRID_SIZE), ID_WALL, dtype=np.uint8)
 
     # hallways
     grid[:, 4:5] = ID_HALLWAY
@@ -81,7 +89,179 @@ def create_floor_plan():
     return grid
 
 def is_walkable(grid, r, c):
-    if 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE:
+    if 0 <= r < grid.shape[0] and 0 <= c < grid.shape[1]:
         val = grid[r, c]
         return val != ID_WALL
-    return False
\ No newline at end of file
+    return False
+
+
+# walkability and adjacency, precomputed once per floor plan
+def walkable_bits(grid):
+    """Walkable cells as a packed bitmap over flat indices (1 bit per cell)."""
+    return np.packbits(np.asarray(grid) != ID_WALL, axis=None)
+
+
+class NeighborTable:
+    """
+    4-connected adjacency of the walkable cells in CSR form: the neighbours
+    of flat cell i are indices[indptr[i]:indptr[i+1]], in up, down, left,
+    right order. Walls have no neighbours and are never anyone's neighbour,
+    so planners expand cells with no bounds or wall checks. Walkability is
+    kept as a packed bitmap; cell ids are int32 (int64 offsets only on maps
+    too big for int32).
+    """
+    def __init__(self, grid):
+        grid = np.asarray(grid)
+        self.shape = grid.shape
+        rows, cols = grid.shape
+        size = rows * cols
+        walk = grid != ID_WALL
+        self.bits = walkable_bits(grid)
+
+        flat = np.arange(size, dtype=np.int32).reshape(rows, cols)
+        cand = np.full((rows, cols, 4), -1, dtype=np.int32)
+        ok = np.zeros((rows, cols, 4), dtype=bool)
+        cand[1:, :, 0], ok[1:, :, 0] = flat[:-1], walk[1:] & walk[:-1]         # up
+        cand[:-1, :, 1], ok[:-1, :, 1] = flat[1:], walk[:-1] & walk[1:]        # down
+        cand[:, 1:, 2], ok[:, 1:, 2] = flat[:, :-1], walk[:, 1:] & walk[:, :-1]  # left
+        cand[:, :-1, 3], ok[:, :-1, 3] = flat[:, 1:], walk[:, :-1] & walk[:, 1:]  # right
+
+        ok = ok.reshape(size, 4)
+        self.indices = cand.reshape(size, 4)[ok]
+        offsets = np.int32 if self.indices.size < 2 ** 31 else np.int64
+        self.indptr = np.zeros(size + 1, dtype=offsets)
+        np.cumsum(ok.sum(axis=1), out=self.indptr[1:])
+        self._lists = None
+
+    def walkable(self, i):
+        return bool((self.bits[i >> 3] >> (7 - (i & 7))) & 1)
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def lists(self):
+        """(indptr, indices) as Python lists, for the pure-Python search loops."""
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist())
+        return self._lists
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self.indptr.nbytes + self.indices.nbytes
+
+
+# floor plans on disk
+#
+# A floor plan is a JSON manifest next to a raster of cell codes:
+#   {"raster": "wing.u8", "shape": [rows, cols],     # or [floors, rows, cols]
+#    "hallway_color": "#2b2b2b", "wall_color": "#000000",
+#    "rooms": [{"name": "Hub", "id": 2, "color": "#2E8B57", "target": [2, 2]}, ...],
+#    "labels": [{"x": 1, "y": 1, "txt": "HUB"}, ...]}  # optional, defaults to room names
+# Codes 0 and 1 are hallway and wall and the Hub must be 2, as everywhere
+# else in the code; other rooms use any code up to 255. A ".u8" raster is
+# raw row-major uint8 and is memory-mapped, so only the pages a run touches
+# are read; a ".csv" raster is parsed into memory (fine for small maps).
+
+def color_scale(colors):
+    """Discrete heatmap colorscale for cell codes 0..len(colors)-1 (use zmin=0, zmax=len(colors)-1)."""
+    n = len(colors)
+    scale = []
+    for i, c in enumerate(colors):
+        scale += [[i / n, c], [(i + 1) / n, c]]
+    return scale
+
+
+class FloorPlan:
+    """A parsed manifest: targets, labels and colorscale, plus open() for the grid."""
+    def __init__(self, raster, shape, targets, labels, colors, floor=0):
+        self.raster = raster
+        self.shape = tuple(shape)
+        self.targets = targets
+        self.labels = labels
+        self.colors = colors
+        self.color_map = color_scale(colors)
+        self.floor = floor
+
+    def open(self):
+        """
+        The grid as uint8. Raw rasters are mapped copy-on-write, so each
+        caller can edit its grid (closures, ...) without touching the file
+        or other callers, and unedited pages are never copied.
+        """
+        if self.raster.endswith(".csv"):
+            grid = np.loadtxt(self.raster, delimiter=",", dtype=np.uint8, ndmin=2).reshape(self.shape)
+        else:
+            grid = np.memmap(self.raster, dtype=np.uint8, mode="c", shape=self.shape)
+        return grid[self.floor] if grid.ndim == 3 else grid
+
+
+def load_floor_plan(path, floor=0):
+    """Read a floor plan manifest (the raster itself is only opened by FloorPlan.open)."""
+    with open(path) as f:
+        manifest = json.load(f)
+    raster = os.path.join(os.path.dirname(os.path.abspath(path)), manifest["raster"])
+    shape = manifest["shape"]
+    if len(shape) not in (2, 3):
+        raise ValueError(f"floor plan shape must be [rows, cols] or [floors, rows, cols], got {shape}")
+    rows, cols = shape[-2:]
+
+    colors = {ID_HALLWAY: manifest.get("hallway_color", "#2b2b2b"), ID_WALL: manifest.get("wall_color", "#000000")}
+    targets, labels = {}, []
+    for room in manifest["rooms"]:
+        code = int(room["id"])
+        if code in colors or not 0 <= code <= 255:
+            raise ValueError(f"room {room['name']!r}: cell code {code} is reserved, repeated or not a byte")
+        r, c = room["target"]
+        if not (0 <= r < rows and 0 <= c < cols):
+            raise ValueError(f"room {room['name']!r}: target {(r, c)} is off the map")
+        colors[code] = room.get("color", "#808080")
+        targets[room["name"]] = (int(r), int(c))
+        labels.append({"x": int(c), "y": int(r), "txt": room["name"].upper()})
+    if colors.get(ID_HUB) is None or "Hub" not in targets:
+        raise ValueError(f"floor plan needs a room named 'Hub' with id {ID_HUB}")
+
+    if len(shape) == 3 and not 0 <= floor < shape[0]:
+        raise ValueError(f"floor {floor} not in a {shape[0]}-floor plan")
+    palette = [colors.get(i, colors[ID_WALL]) for i in range(max(colors) + 1)]
+    return FloorPlan(raster, shape, targets, manifest.get("labels", labels), palette, floor)
+
+
+def use_floor_plan(plan):
+    """
+    Make plan the map: create_floor_plan() returns its grid and TARGETS,
+    LABELS and COLOR_MAP are replaced in place, so modules holding them see
+    the new rooms. The FLOOR_PLAN environment variable does this when the
+    module loads.
+    """
+    global _PLAN
+    _PLAN = plan
+    TARGETS.clear()
+    TARGETS.update(plan.targets)
+    LABELS[:] = plan.labels
+    COLOR_MAP[:] = plan.color_map
+
+
+def save_floor_plan(path, grid, rooms=None, labels=None, hallway_color="#2b2b2b", wall_color="#000000"):
+    """
+    Write grid as a raw uint8 raster plus a manifest at path. rooms is a list
+    of {"name", "id", "color", "target"}; by default the built-in rooms.
+    """
+    grid = np.asarray(grid)
+    if grid.max(initial=0) > 255 or grid.min(initial=0) < 0:
+        raise ValueError("cell codes must fit in a byte")
+    if rooms is None:
+        codes = {"Hub": ID_HUB, "Maternity": ID_MATERNITY, "ICU": ID_ICU, "Waiting Room": ID_WAITING, "ER": ID_ER, "OR": ID_OR}
+        rooms = [{"name": n, "id": codes[n], "color": COLOR_MAP[2 * codes[n]][1], "target": list(TARGETS[n])} for n in codes]
+        labels = LABELS if labels is None else labels
+    raster = os.path.splitext(path)[0] + ".u8"
+    np.ascontiguousarray(grid, dtype=np.uint8).tofile(raster)
+    manifest = {"raster": os.path.basename(raster), "shape": list(grid.shape),
+                "hallway_color": hallway_color, "wall_color": wall_color, "rooms": rooms}
+    if labels is not None:
+        manifest["labels"] = list(labels)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+if os.environ.get("FLOOR_PLAN"):
+    use_floor_plan(load_floor_plan(os.environ["FLOOR_PLAN"], int(os.environ.get("FLOOR_PLAN_FLOOR", 0))))
@@ -0,0 +1,260 @@
+import heapq
+from collections import deque
+import numpy as np
+import grid as map_data
+
+# border segments at least this long get an entrance at both ends instead of one in the middle
+LONG_ENTRANCE = 6
+
+
+class HierarchicalPathfinder:
+    """
+    HPA* over the floor plan.
+
+    The grid is cut into square clusters. Wherever two neighbouring clusters
+    share an open border segment we place entrance nodes, and inside each
+    cluster we precompute the walking distance between its entrances.
+    A query searches that small abstract graph and only then refines the
+    chosen hops into cells, one cluster at a time. Paths are near-optimal,
+    not guaranteed shortest.
+    """
+    def __init__(self, grid, cluster_size=16, version=0):
+        self.cluster_size = cluster_size
+        self.build(grid)
+        self.grid_version = version
+
+    def build(self, grid):
+        grid = np.asarray(grid)
+        self.rows, self.cols = grid.shape
+        k = self.cluster_size
+        self.n_crows = -(-self.rows // k)
+        self.n_ccols = -(-self.cols // k)
+        self.walkable = bytearray((grid != map_data.ID_WALL).ravel().tolist())
+
+        self._borders = {}   # (cluster, cluster) -> [(cell, cell), ...]
+        self._nodes = {}     # cluster -> set of entrance cells
+        self._inter = {}     # entrance cell -> set of cells across the border
+        self._intra = {}     # entrance cell -> {entrance cell: steps} within its cluster
+
+        clusters = range(self.n_crows * self.n_ccols)
+        for cid in clusters:
+            for border in self._cluster_borders(cid):
+                if border not in self._borders:
+                    self._build_border(*border)
+        for cid in clusters:
+            self._build_cluster(cid)
+
+    # geometry
+    def cluster_of(self, cell):
+        r, c = divmod(cell, self.cols)
+        return (r // self.cluster_size) * self.n_ccols + c // self.cluster_size
+
+    def _bounds(self, cid):
+        k = self.cluster_size
+        cr, cc = divmod(cid, self.n_ccols)
+        return cr * k, min((cr + 1) * k, self.rows), cc * k, min((cc + 1) * k, self.cols)
+
+    def _cluster_borders(self, cid):
+        cr, cc = divmod(cid, self.n_ccols)
+        if cc > 0: yield (cid - 1, cid)
+        if cc < self.n_ccols - 1: yield (cid, cid + 1)
+        if cr > 0: yield (cid - self.n_ccols, cid)
+        if cr < self.n_crows - 1: yield (cid, cid + self.n_ccols)
+
+    # abstract graph construction
+    def _build_border(self, a, b):
+        r0, r1, c0, c1 = self._bounds(a)
+        w = self.walkable
+        if a // self.n_ccols == b // self.n_ccols:
+            # vertical border: last column of a against first column of b
+            pairs = [(r * self.cols + c1 - 1, r * self.cols + c1) for r in range(r0, r1)]
+        else:
+            pairs = [(r1 * self.cols - self.cols + c, r1 * self.cols + c) for c in range(c0, c1)]
+
+        entrances = []
+        run = []
+        for p, q in pairs + [(None, None)]:
+            if p is not None and w[p] and w[q]:
+                run.append((p, q))
+                continue
+            if run:
+                if len(run) >= LONG_ENTRANCE:
+                    entrances += [run[0], run[-1]]
+                else:
+                    entrances.append(run[len(run) // 2])
+                run = []
+
+        for p, q in self._borders.get((a, b), ()):
+            self._inter[p].discard(q)
+            self._inter[q].discard(p)
+        self._borders[(a, b)] = entrances
+        for p, q in entrances:
+            self._inter.setdefault(p, set()).add(q)
+            self._inter.setdefault(q, set()).add(p)
+
+    def _build_cluster(self, cid):
+        nodes = set()
+        for border in self._cluster_borders(cid):
+            for p, q in self._borders.get(border, ()):
+                nodes.add(p if self.cluster_of(p) == cid else q)
+        for old in self._nodes.get(cid, set()) - nodes:
+            self._intra.pop(old, None)
+            if not self._inter.get(old):
+                self._inter.pop(old, None)
+        self._nodes[cid] = nodes
+        for n in nodes:
+            dist, _ = self._bfs(n, self._bounds(cid))
+            self._intra[n] = {m: dist[m] for m in nodes if m != n and m in dist}
+
+    def _pair_bounds(self, a, b):
+        # rectangle covering cluster a and cluster b, if they are the same or side by side
+        if a == b or (a, b) in self._borders or (b, a) in self._borders:
+            ra, rb = self._bounds(a), self._bounds(b)
+            return min(ra[0], rb[0]), max(ra[1], rb[1]), min(ra[2], rb[2]), max(ra[3], rb[3])
+        return None
+
+    def _bfs(self, src, bounds, goal=None):
+        # breadth-first search that never leaves the (r0, r1, c0, c1) rectangle
+        r0, r1, c0, c1 = bounds
+        cols, w = self.cols, self.walkable
+        dist = {src: 0}
+        parent = {src: None}
+        queue = deque([src])
+        while queue:
+            cur = queue.popleft()
+            if cur == goal:
+                break
+            r, c = divmod(cur, cols)
+            for nxt, ok in ((cur - cols, r > r0), (cur + cols, r < r1 - 1),
+                            (cur - 1, c > c0), (cur + 1, c < c1 - 1)):
+                if ok and w[nxt] and nxt not in dist:
+                    dist[nxt] = dist[cur] + 1
+                    parent[nxt] = cur
+                    queue.append(nxt)
+        return dist, parent
+
+    def _local_path(self, a, b, bounds):
+        _, parent = self._bfs(a, bounds, goal=b)
+        if b not in parent:
+            return None
+        path = []
+        while b != a:
+            path.append(b)
+            b = parent[b]
+        return path[::-1]
+
+    # updates
+    def update(self, grid, cells):
+        """
+        Re-sync after grid changed at the given (row, col) cells.
+        Only the clusters containing them, and the neighbours they share
+        a border with, are rebuilt.
+        """
+        affected = set()
+        for r, c in cells:
+            r, c = int(r), int(c)
+            cell = r * self.cols + c
+            self.walkable[cell] = int(grid[r, c] != map_data.ID_WALL)
+            affected.add(self.cluster_of(cell))
+        touched = set(affected)
+        for cid in affected:
+            for a, b in self._cluster_borders(cid):
+                self._build_border(a, b)
+                touched.update((a, b))
+        for cid in touched:
+            self._build_cluster(cid)
+
+    def sync(self, grid, version, cells=None):
+        """
+        Pick up a new grid version: update() the clusters around `cells`
+        (the cells changed since the last sync) if given, else rebuild.
+        """
+        if version == self.grid_version:
+            return
+        self.grid_version = version
+        if cells is None or grid.shape != (self.rows, self.cols):
+            self.build(grid)
+        else:
+            self.update(grid, cells)
+
+    # queries
+    def find_path(self, start, end):
+        """Cells (row, col) after start up to end, [] if none."""
+        s = int(start[0]) * self.cols + int(start[1])
+        t = int(end[0]) * self.cols + int(end[1])
+        if s == t or not self.walkable[t]:
+            return []
+        sc, tc = self.cluster_of(s), self.cluster_of(t)
+
+        # distances from start / to goal to the entrances of their own clusters
+        s_dist, _ = self._bfs(s, self._bounds(sc))
+        t_dist, _ = self._bfs(t, self._bounds(tc))
+        s_edges = {n: s_dist[n] for n in self._nodes[sc] if n in s_dist}
+        t_edges = {n: t_dist[n] for n in self._nodes[tc] if n in t_dist}
+
+        # nearby endpoints: also try a plain search over the one or two clusters involved
+        local = self._pair_bounds(sc, tc)
+        direct = self._local_path(s, t, local) if local else None
+
+        route = self._abstract_search(s, t, s_edges, t_edges)
+        if route is None and direct is None:
+            return []
+        if route is None or (direct is not None and len(direct) <= route[0]):
+            return [divmod(x, self.cols) for x in direct]
+
+        path = []
+        hops = [s] + route[1] + [t]
+        for a, b in zip(hops, hops[1:]):
+            if a == b:
+                continue
+            if b in self._inter.get(a, ()):
+                path.append(b)
+            else:
+                path += self._local_path(a, b, self._bounds(self.cluster_of(a)))
+        return [divmod(x, self.cols) for x in path]
+
+    def _abstract_search(self, s, t, s_edges, t_edges):
+        # A* over entrances; returns (cost, [entrance, ...]) or None
+        cols = self.cols
+        tr, tc = divmod(t, cols)
+        GOAL = -1
+
+        def h(n):
+            r, c = divmod(n, cols)
+            return abs(r - tr) + abs(c - tc)
+
+        g = {}
+        parent = {}
+        heap = []
+        for n, d in s_edges.items():
+            g[n] = d
+            parent[n] = None
+            heapq.heappush(heap, (d + h(n), d, n))
+        best_goal = None
+        while heap:
+            _, cost, n = heapq.heappop(heap)
+            if n == GOAL:
+                break
+            if cost > g[n]:
+                continue
+            if n in t_edges:
+                total = cost + t_edges[n]
+                if best_goal is None or total < best_goal[0]:
+                    best_goal = (total, n)
+                    heapq.heappush(heap, (total, total, GOAL))
+            steps = list(self._intra.get(n, {}).items())
+            steps += [(m, 1) for m in self._inter.get(n, ())]
+            for m, d in steps:
+                ng = cost + d
+                if m not in g or ng < g[m]:
+                    g[m] = ng
+                    parent[m] = n
+                    heapq.heappush(heap, (ng + h(m), ng, m))
+        if best_goal is None:
+            return None
+        route = []
+        n = best_goal[1]
+        while n is not None:
+            route.append(n)
+            n = parent[n]
+        return best_goal[0], route[::-1]
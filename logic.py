@@ -1,4 +1,8 @@
 import time
+import heapq
+import itertools
+import numpy as np
+
 def calculate_priority(patient):
     """
     calculates priority score based on CTAS, urgency, and wait time.
@@ -8,7 +12,7 @@ def calculate_priority(patient):
     # CTAS 1 = 100, CTAS 5 = 500
     priority_score = patient["ctas"] * 100
 
-   
+
     waiting_time = (time.time() - patient["arrival_time"]) / 60
     priority_score += waiting_time
 
@@ -17,34 +21,126 @@ def calculate_priority(patient):
 
     return priority_score
 
+def static_priority(patient):
+    """
+    time-invariant version of calculate_priority.
+    calculate_priority(p) == static_priority(p) + time.time() / 60, and the
+    time.time() term is the same for every patient, so ordering by this key
+    never needs re-scoring as the clock moves.
+    """
+    return patient["ctas"] * 100 - patient["arrival_time"] / 60 - patient["urgency"] * 5
+
+def triage_key(patient):
+    # CTAS 1 always goes to the front
+    return (0 if patient["ctas"] == 1 else 1, static_priority(patient))
+
+def _batch_arrays(patient_list):
+    n = len(patient_list)
+    ctas = np.fromiter((p["ctas"] for p in patient_list), dtype=np.int64, count=n)
+    urgency = np.fromiter((p["urgency"] for p in patient_list), dtype=np.float64, count=n)
+    arrival = np.fromiter((p["arrival_time"] for p in patient_list), dtype=np.float64, count=n)
+    return ctas, urgency, arrival
+
+def batch_static_priority(patient_list):
+    """
+    static_priority for a whole queue in one pass.
+    Returns (ctas, scores) arrays; scores match static_priority exactly.
+    """
+    ctas, urgency, arrival = _batch_arrays(patient_list)
+    return ctas, ctas * 100 - arrival / 60 - urgency * 5
+
 def prioritize_patients(patient_list):
     """
-    Sorts the patient list using the custom Insertion Sort logic.
-    """
-    sorted_patients = []
-
-    for patient in patient_list:
-        # CTAS 1 always goes to the front
-        if patient["ctas"] == 1:
-            sorted_patients.insert(0, patient)
-            continue
-
-        patient_priority = calculate_priority(patient)
-        inserted = False
-
-        # insertion sort
-        for i in range(len(sorted_patients)):
-            # cannot displace CTAS 1 patients
-            if sorted_patients[i]["ctas"] == 1:
-                continue
-            
-            # compare scores
-            if patient_priority < calculate_priority(sorted_patients[i]):
-                sorted_patients.insert(i, patient)
-                inserted = True
-                break
-    
-        if not inserted:
-            sorted_patients.append(patient)
-
-    return sorted_patients
\ No newline at end of file
+    Sorts the patient list by triage key (CTAS 1 first, then score).
+    Ties keep their original order.
+    """
+    if not patient_list:
+        return []
+    ctas, scores = batch_static_priority(patient_list)
+    # lexsort is stable and its last key is primary
+    order = np.lexsort((scores, ctas != 1))
+    return [patient_list[i] for i in order]
+
+
+class TriageQueue:
+    """
+    Persistent heap-backed triage queue.
+    push/pop/peek/remove are O(log n); removed entries are dropped lazily.
+    """
+    def __init__(self, patients=()):
+        self._heap = []
+        self._entries = {}  # id -> heap entry
+        self._counter = itertools.count()
+        self.extend(patients)
+
+    def _make_entry(self, patient, key=None):
+        if patient["id"] in self._entries:
+            raise ValueError(f"task {patient['id']} is already queued")
+        if key is None:
+            key = triage_key(patient)
+        # seq keeps ties in arrival order
+        entry = [*key, next(self._counter), patient]
+        self._entries[patient["id"]] = entry
+        return entry
+
+    def push(self, patient):
+        heapq.heappush(self._heap, self._make_entry(patient))
+
+    def extend(self, patients):
+        patients = list(patients)
+        # check the whole batch first so a duplicate leaves the queue untouched
+        seen = set()
+        for p in patients:
+            if p["id"] in self._entries or p["id"] in seen:
+                raise ValueError(f"task {p['id']} is already queued")
+            seen.add(p["id"])
+        # small additions are cheaper as pushes than a full re-heapify
+        if len(patients) < len(self._heap) // 8:
+            for p in patients:
+                self.push(p)
+            return
+        # score the whole batch at once
+        ctas, scores = batch_static_priority(patients)
+        flags = (ctas != 1).astype(int).tolist()
+        for p, flag, score in zip(patients, flags, scores.tolist()):
+            self._heap.append(self._make_entry(p, (flag, score)))
+        heapq.heapify(self._heap)
+
+    def _drop_removed(self):
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        self._drop_removed()
+        if not self._heap:
+            raise IndexError("peek from an empty triage queue")
+        return self._heap[0][-1]
+
+    def pop(self):
+        self._drop_removed()
+        if not self._heap:
+            raise IndexError("pop from an empty triage queue")
+        entry = heapq.heappop(self._heap)
+        del self._entries[entry[-1]["id"]]
+        return entry[-1]
+
+    def remove(self, task_id):
+        """Remove a queued task by id and return it."""
+        entry = self._entries.pop(task_id)
+        patient = entry[-1]
+        entry[-1] = None
+        return patient
+
+    def __contains__(self, task_id):
+        return task_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __iter__(self):
+        # priority order, does not consume the queue
+        for entry in sorted(self._entries.values(), key=lambda e: e[:-1]):
+            yield entry[-1]
@@ -0,0 +1,182 @@
+import heapq
+import numpy as np
+import grid as map_data
+
+
+class GridPathfinder:
+    """
+    A* / Jump Point Search over flat cell indices.
+
+    The grid is padded with a ring of walls and flattened once, so expanding
+    a node is four index offsets and a byte lookup with no bounds checks.
+    Cost/parent arrays are allocated once and reused between searches; a
+    per-search stamp marks which entries are valid so nothing is cleared.
+    """
+    def __init__(self, grid, version=0):
+        self.build(grid)
+        self.grid_version = version
+
+    def build(self, grid):
+        grid = np.asarray(grid)
+        rows, cols = grid.shape
+        self.shape = (rows, cols)
+        self.width = cols + 2
+        padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = grid != map_data.ID_WALL
+        self.walkable = padded.tobytes()
+        size = padded.size
+        self._g = [0] * size
+        self._parent = [-1] * size
+        self._stamp = [0] * size
+        self._search = 0
+
+    def sync(self, grid, version):
+        """Rebuild if the grid's version moved on since the last build."""
+        if version != self.grid_version:
+            self.build(grid)
+            self.grid_version = version
+
+    def _index(self, pos):
+        return (int(pos[0]) + 1) * self.width + int(pos[1]) + 1
+
+    def _cell(self, i):
+        r, c = divmod(i, self.width)
+        return (r - 1, c - 1)
+
+    def _inside(self, pos):
+        return 0 <= pos[0] < self.shape[0] and 0 <= pos[1] < self.shape[1]
+
+    def _begin(self, start, end):
+        self._search += 1
+        s, t = self._index(start), self._index(end)
+        self._stamp[s] = self._search
+        self._g[s] = 0
+        self._parent[s] = -1
+        return s, t
+
+    def _trace(self, s, t):
+        # walk parents back from the goal, filling straight runs between jump points
+        W = self.width
+        parent = self._parent
+        path = []
+        cur = t
+        while cur != s:
+            prev = parent[cur]
+            step = 1 if abs(cur - prev) < W else W
+            if cur < prev:
+                step = -step
+            while cur != prev:
+                path.append(self._cell(cur))
+                cur -= step
+        return path[::-1]
+
+    def astar(self, start, end):
+        """Shortest path as a list of (row, col) after start up to end, [] if none."""
+        if not (self._inside(start) and self._inside(end)):
+            return []
+        s, t = self._begin(start, end)
+        if s == t:
+            return []
+        W = self.width
+        walkable, g, parent, stamp = self.walkable, self._g, self._parent, self._stamp
+        search = self._search
+        tr, tc = divmod(t, W)
+        offsets = (-W, W, -1, 1)
+
+        heap = [(0, 0, s)]
+        while heap:
+            _, neg_g, cur = heapq.heappop(heap)
+            if cur == t:
+                return self._trace(s, t)
+            cost = -neg_g
+            if cost > g[cur]:
+                continue  # stale entry
+            ng = cost + 1
+            for off in offsets:
+                nxt = cur + off
+                if walkable[nxt] and (stamp[nxt] != search or ng < g[nxt]):
+                    stamp[nxt] = search
+                    g[nxt] = ng
+                    parent[nxt] = cur
+                    r, c = divmod(nxt, W)
+                    # deeper nodes first on equal f
+                    heapq.heappush(heap, (ng + abs(r - tr) + abs(c - tc), -ng, nxt))
+        return []
+
+    # jump point search (4-connected, uniform cost)
+    def _jump_h(self, x, d, goal):
+        W, w = self.width, self.walkable
+        while True:
+            x += d
+            if not w[x]:
+                return -1
+            if x == goal:
+                return x
+            # forced neighbour: an opening above/below that was closed one step back
+            if (w[x - W] and not w[x - d - W]) or (w[x + W] and not w[x - d + W]):
+                return x
+
+    def _jump_v(self, x, d, goal):
+        w = self.walkable
+        while True:
+            x += d
+            if not w[x]:
+                return -1
+            if x == goal:
+                return x
+            if (w[x - 1] and not w[x - d - 1]) or (w[x + 1] and not w[x - d + 1]):
+                return x
+            # vertical moves stop wherever a sideways scan finds something
+            if self._jump_h(x, 1, goal) >= 0 or self._jump_h(x, -1, goal) >= 0:
+                return x
+
+    def jps(self, start, end):
+        """Same result contract and path length as astar, fewer heap operations."""
+        if not (self._inside(start) and self._inside(end)):
+            return []
+        s, t = self._begin(start, end)
+        if s == t:
+            return []
+        W = self.width
+        walkable, g, parent, stamp = self.walkable, self._g, self._parent, self._stamp
+        search = self._search
+        tr, tc = divmod(t, W)
+
+        heap = [(0, 0, s)]
+        while heap:
+            _, neg_g, cur = heapq.heappop(heap)
+            if cur == t:
+                return self._trace(s, t)
+            cost = -neg_g
+            if cost > g[cur]:
+                continue
+            par = parent[cur]
+            if par < 0:
+                dirs = (-W, W, -1, 1)
+            elif abs(cur - par) < W:
+                d = 1 if cur > par else -1
+                dirs = (d, -W, W)
+            else:
+                d = W if cur > par else -W
+                dirs = (d, -1, 1)
+
+            for d in dirs:
+                if not walkable[cur + d]:
+                    continue
+                if d == 1 or d == -1:
+                    jp = self._jump_h(cur, d, t)
+                    if jp < 0:
+                        continue
+                    ng = cost + abs(jp - cur)
+                else:
+                    jp = self._jump_v(cur, d, t)
+                    if jp < 0:
+                        continue
+                    ng = cost + abs(jp - cur) // W
+                if stamp[jp] != search or ng < g[jp]:
+                    stamp[jp] = search
+                    g[jp] = ng
+                    parent[jp] = cur
+                    r, c = divmod(jp, W)
+                    heapq.heappush(heap, (ng + abs(r - tr) + abs(c - tc), -ng, jp))
+        return []
@@ -0,0 +1,152 @@
+import numpy as np
+import plotly.graph_objects as go
+import grid as map_data
+
+STATUS_COLORS = {"IDLE": "#00FF00", "CHARGING": "#00FFFF"}
+MOVING_COLOR = "#FFA500"
+CRITICAL_COLOR = "#FF00FF"
+
+# trace order in the cached figure
+HEATMAP, LABELS, DENSITY, PATHS, DRONES = range(5)
+
+# above this many drones the view draws density instead of every drone
+DENSITY_THRESHOLD = 50
+# density bins per side and individually drawn drones, whatever the fleet or grid size
+MAX_BINS = 64
+MAX_MARKERS = 100
+
+# zero is transparent so the floor plan shows through
+DENSITY_COLORS = [[0.0, "rgba(255,215,0,0)"], [1e-6, "rgba(255,215,0,0.35)"], [1.0, "rgba(255,69,0,0.9)"]]
+
+
+class FloorPlanView:
+    """
+    The Floor Plan figure, kept between reruns.
+
+    The heatmap and room labels are built once per floor plan (rebuilt only
+    when figure() gets another grid or grid version, e.g.
+    Simulation.grid_version after a closure) and the figure always has the
+    same five traces.
+    Each tick only the path trace (every drone's path in one line, broken by
+    None) and the drone markers are rewritten in place, so building a frame
+    depends on the fleet, not the grid.
+
+    This saves work on the server only; shrinking what goes to the browser
+    is out of scope. st.plotly_chart serializes and sends the whole figure
+    on every rerun, static heatmap included, and sending just the changed
+    traces would need a custom component that patches the chart in the
+    browser. The grid does go out as a uint8 array, which plotly sends as a
+    compact typed array rather than nested lists.
+
+    With more than `threshold` drones the view switches to density mode:
+    drone positions ("occupancy") or the cells on their planned paths
+    ("traffic") are counted into at most MAX_BINS x MAX_BINS bins drawn
+    over the floor plan, and only selected drones and drones carrying a
+    CTAS 1 task get a marker and path (at most MAX_MARKERS), so a frame
+    stays the same size however large the fleet.
+    """
+    def __init__(self, height=650, threshold=DENSITY_THRESHOLD):
+        self.height = height
+        self.threshold = threshold
+        self.fig = None
+        self._key = None
+
+    def _build(self, grid):
+        fig = go.Figure()
+
+        # map as trace
+        fig.add_trace(go.Heatmap(z=np.asarray(grid, dtype=np.uint8), colorscale=map_data.COLOR_MAP,
+                                 zmin=0, zmax=len(map_data.COLOR_MAP) // 2 - 1, showscale=False, hoverinfo='skip'))
+
+        # add label
+        fig.add_trace(go.Scatter(
+            x=[l['x'] for l in map_data.LABELS],
+            y=[l['y'] for l in map_data.LABELS],
+            text=[l['txt'] for l in map_data.LABELS],
+            mode="text", textfont=dict(color="white", size=14, family="Arial Black")
+        ))
+
+        # density overlay, paths and drones, filled in by figure()
+        fig.add_trace(go.Heatmap(z=[[0]], colorscale=DENSITY_COLORS, zmin=0, showscale=False, visible=False,
+                                 hovertemplate="%{z} drones<extra></extra>"))
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', line=dict(color='#00FF00', width=2, dash='dot'),
+                                 connectgaps=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(
+            x=[], y=[], mode='markers+text',
+            marker=dict(size=20, line=dict(width=2, color='white')),
+            textposition="top center", textfont=dict(color="white")
+        ))
+
+        # uirevision keeps the user's zoom/pan across reruns
+        fig.update_layout(height=self.height, margin=dict(l=0, r=0, t=0, b=0), uirevision="floor",
+                          yaxis=dict(autorange='reversed', visible=False, scaleanchor="x"), xaxis=dict(visible=False),
+                          plot_bgcolor='#0e1117', paper_bgcolor='#0e1117')
+        return fig
+
+    def dense(self, drones):
+        return len(drones) > self.threshold
+
+    def _bin_size(self, shape):
+        return max(1, -(-max(shape) // MAX_BINS))
+
+    def density(self, shape, drones, layer="occupancy"):
+        """(bin size, counts per bin) of drone positions or planned path cells."""
+        k = self._bin_size(shape)
+        counts = np.zeros((-(-shape[0] // k), -(-shape[1] // k)), dtype=np.int32)
+        if layer == "traffic":
+            cells = [p for d in drones for p in d['path']]
+        else:
+            cells = [d['pos'] for d in drones]
+        if cells:
+            cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2) // k
+            np.add.at(counts, (cells[:, 0], cells[:, 1]), 1)
+        return k, counts
+
+    def _marked(self, drones, selected):
+        # selected drones first, then those on critical tasks
+        picked = [d for d in drones if d['id'] in selected]
+        picked += [d for d in drones if d['id'] not in selected and _critical(d)]
+        return picked[:MAX_MARKERS]
+
+    def figure(self, grid, drones, selected=(), layer="occupancy", version=0):
+        """
+        The figure with drones (Simulation.drones records) drawn on grid.
+        `version` must change whenever grid is edited in place. In density
+        mode `layer` picks occupancy or traffic and `selected` names the
+        drones to draw individually.
+        """
+        key = (id(grid), np.shape(grid), version)
+        if self.fig is None or key != self._key:
+            self.fig, self._key = self._build(grid), key
+
+        dense = self.dense(drones)
+        if dense:
+            k, counts = self.density(np.shape(grid), drones, layer)
+            drones = self._marked(drones, set(selected))
+
+        px, py = [], []
+        for d in drones:
+            if d['path']:
+                px += [d['pos'][1]] + [p[1] for p in d['path']] + [None]
+                py += [d['pos'][0]] + [p[0] for p in d['path']] + [None]
+
+        with self.fig.batch_update():
+            if dense:
+                # bin b covers cells b*k .. b*k+k-1, so its centre is at b*k + (k-1)/2
+                self.fig.data[DENSITY].update(z=counts, x0=(k - 1) / 2, dx=k, y0=(k - 1) / 2, dy=k, visible=True,
+                                              hovertemplate="%{z} " + ("path cells" if layer == "traffic" else "drones") + "<extra></extra>")
+            else:
+                self.fig.data[DENSITY].update(z=[[0]], visible=False)
+            self.fig.data[PATHS].update(x=px, y=py)
+            self.fig.data[DRONES].update(
+                x=[d['pos'][1] for d in drones],
+                y=[d['pos'][0] for d in drones],
+                text=[d['id'] for d in drones],
+                marker_color=[CRITICAL_COLOR if dense and _critical(d) else STATUS_COLORS.get(d['status'], MOVING_COLOR)
+                              for d in drones],
+            )
+        return self.fig
+
+
+def _critical(drone):
+    return any(s.get('ctas') == 1 for s in drone['stops'])
@@ -0,0 +1,180 @@
+import heapq
+from collections import deque
+import numpy as np
+import grid as map_data
+
+# above this many changed cells a full rebuild is cheaper than repairing
+REPAIR_LIMIT = 64
+
+
+class RouteCache:
+    """
+    Next-hop and distance tables from every walkable cell to every target.
+    Built with one reverse BFS per target, so a route lookup is just a walk
+    along next-hop pointers.
+
+    The tables follow the grid array they were built from. Whoever edits
+    that grid in place bumps its version and calls sync() with the cells
+    that changed (Simulation.close/reopen do), so lookups never compare
+    grids. When a few cells change walkability (hallway closures) the
+    tables are repaired instead of rebuilt: for each target, the cells
+    whose route ran through a newly closed cell are cleared and refilled
+    from the cells around them, and reopened cells spread shorter distances
+    outwards. Distances match a fresh build; among equally short routes the
+    next hop may differ. `version` changes whenever the tables do.
+    """
+    def __init__(self, targets=None, repair_limit=REPAIR_LIMIT):
+        self.repair_limit = repair_limit
+        self.targets = dict(map_data.TARGETS if targets is None else targets)
+        cells = sorted(set(tuple(t) for t in self.targets.values()))
+        self._index = {cell: i for i, cell in enumerate(cells)}  # target cell -> table row
+        self._grid = None         # the array the tables were built from
+        self.grid_version = None  # its version at the last sync
+        self.dist = None       # (n_targets, rows * cols), -1 = unreachable
+        self.next_hop = None   # flat index of the next cell towards the target
+        self.version = 0
+
+    def build(self, grid):
+        rows, cols = grid.shape
+        size = rows * cols
+        table = map_data.NeighborTable(grid)
+        indptr, indices = table.lists()
+
+        cells = sorted(self._index, key=self._index.get)
+        dist = np.full((len(cells), size), -1, dtype=np.int32)
+        next_hop = np.full((len(cells), size), -1, dtype=np.int32)
+
+        for row, (tr, tc) in enumerate(cells):
+            d = [-1] * size
+            hop = [-1] * size
+            src = tr * cols + tc
+            if 0 <= tr < rows and 0 <= tc < cols and table.walkable(src):
+                d[src] = 0
+                hop[src] = src
+                queue = deque([src])
+                while queue:
+                    cur = queue.popleft()
+                    nd = d[cur] + 1
+                    for nxt in indices[indptr[cur]:indptr[cur + 1]]:
+                        if d[nxt] < 0:
+                            d[nxt] = nd
+                            hop[nxt] = cur  # step back towards the target
+                            queue.append(nxt)
+            dist[row] = d
+            next_hop[row] = hop
+
+        self.dist = dist
+        self.next_hop = next_hop
+        self._grid = grid
+        self.version += 1
+
+    def sync(self, grid, version, cells=None):
+        """
+        Bring the tables up to date with grid at `version`: nothing to do if
+        they already are, a repair if `cells` lists the (row, col) cells
+        changed since the last sync and there are only a few, else a rebuild.
+        """
+        if grid is self._grid and version == self.grid_version:
+            return
+        self.grid_version = version
+        if grid is not self._grid or cells is None or len(cells) > self.repair_limit:
+            return self.build(grid)
+        cols = grid.shape[1]
+        changed = sorted({int(r) * cols + int(c) for r, c in cells})
+        if changed:
+            walk = (np.asarray(grid) != map_data.ID_WALL).ravel().tobytes()
+            for (tr, tc), row in self._index.items():
+                self._repair(row, tr * cols + tc, changed, walk, grid.shape)
+        self.version += 1
+
+    def _repair(self, row, target, changed, walk, shape):
+        rows, cols = shape
+        dist = memoryview(self.dist[row])
+        hop = memoryview(self.next_hop[row])
+
+        def around(u):
+            r, c = divmod(u, cols)
+            if r > 0: yield u - cols
+            if r < rows - 1: yield u + cols
+            if c > 0: yield u - 1
+            if c < cols - 1: yield u + 1
+
+        # cells routed through a closed cell lose their distance
+        lost = []
+        stack = [u for u in changed if not walk[u] and dist[u] >= 0]
+        while stack:
+            u = stack.pop()
+            lost.append(u)
+            for v in around(u):
+                if hop[v] == u and v != u and dist[v] >= 0:
+                    dist[v] = -1
+                    stack.append(v)
+            dist[u] = -1
+            hop[u] = -1
+
+        # refill them, and reopened cells, from their settled neighbours
+        heap = []
+        if walk[target] and dist[target] != 0:
+            dist[target] = 0
+            hop[target] = target
+            heap.append((0, target))
+        for u in lost + [u for u in changed if walk[u]]:
+            if not walk[u]:
+                continue
+            for v in around(u):
+                if walk[v] and dist[v] >= 0 and (dist[u] < 0 or dist[v] + 1 < dist[u]):
+                    dist[u] = dist[v] + 1
+                    hop[u] = v
+            if dist[u] >= 0:
+                heap.append((dist[u], u))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d != dist[u]:
+                continue
+            for v in around(u):
+                if walk[v] and (dist[v] < 0 or d + 1 < dist[v]):
+                    dist[v] = d + 1
+                    hop[v] = u
+                    heapq.heappush(heap, (d + 1, v))
+
+    def _ensure(self, grid):
+        # a grid edited in place is picked up by sync(), not here
+        if grid is not self._grid:
+            self.build(grid)
+
+    def covers(self, end):
+        return tuple(end) in self._index
+
+    def distance(self, grid, start, end):
+        """Steps from start to a target cell, or None if unreachable."""
+        self._ensure(grid)
+        cols = grid.shape[1]
+        d = self.dist[self._index[tuple(end)], int(start[0]) * cols + int(start[1])]
+        return None if d < 0 else int(d)
+
+    def distance_field(self, grid, end):
+        """Steps from every flat cell index to a target cell (-1 = unreachable)."""
+        self._ensure(grid)
+        return self.dist[self._index[tuple(end)]]
+
+    def next_hop_field(self, grid, end):
+        """Flat index of the next cell towards a target, for every flat cell index."""
+        self._ensure(grid)
+        return self.next_hop[self._index[tuple(end)]]
+
+    def path(self, grid, start, end):
+        """Cells (row, col) after start up to end, [] if none."""
+        self._ensure(grid)
+        cols = grid.shape[1]
+        row = self._index[tuple(end)]
+        hop = self.next_hop[row]
+        cur = int(start[0]) * cols + int(start[1])
+        if self.dist[row, cur] <= 0:
+            return []
+        path = []
+        goal = int(end[0]) * cols + int(end[1])
+        while cur != goal:
+            cur = int(hop[cur])
+            path.append(divmod(cur, cols))
+        return path
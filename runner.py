@@ -0,0 +1,65 @@
+import threading
+import time
+import weakref
+
+
+class SimRunner:
+    """
+    Steps a Simulation on a background thread at `tick_rate` ticks per
+    second, so the simulation keeps its own pace no matter how long the
+    dashboard takes to draw. Anything that reads or changes the simulation
+    from another thread should hold `lock`.
+
+    Ticks are scheduled against a fixed clock; if a step overruns, the
+    runner carries on from now instead of bursting to catch up. The thread
+    only holds the runner while stepping, so a runner nobody references
+    any more (a closed dashboard session) stops its thread and lets the
+    simulation be collected.
+    """
+    def __init__(self, sim, tick_rate=10.0):
+        self.sim = sim
+        self.tick_rate = tick_rate
+        self.lock = threading.RLock()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = None
+        weakref.finalize(self, self._stop.set)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(weakref.ref(self), self._stop),
+                                        name="sim-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop stepping; False if the thread was still in a step after timeout."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+        self._thread = None
+        return True
+
+    @staticmethod
+    def _loop(ref, stop):
+        due = time.perf_counter()
+        while not stop.is_set():
+            runner = ref()
+            if runner is None:
+                break
+            with runner.lock:
+                runner.sim.step()
+                runner.ticks += 1
+            due += 1.0 / max(runner.tick_rate, 1e-3)
+            del runner
+            now = time.perf_counter()
+            if due < now:
+                due = now  # fell behind, don't burst
+            stop.wait(due - now)
@@ -0,0 +1,474 @@
+import numpy as np
+import backend
+import grid as map_data
+import logic
+import routing
+import cooperative
+import tracefile
+import assignment
+import energy
+import tours
+import staging
+import charging
+import spatial
+import eventlog
+
+# drone starting cells inside the hub
+DRONE_INIT = [(1, 0), (2, 1), (1, 2)]
+
+DIRS = {(0,1):"right", (0,-1):"left", (1,0):"down", (-1,0):"up"}
+
+# up to this many available drones, dispatch considers all of them
+NEAREST_SCAN = 64
+
+
+class Simulation:
+    """
+    Headless fleet simulation: dispatch, movement, charging and returning.
+    Holds everything app.py used to keep in st.session_state, so it can run
+    without Streamlit; the dashboard just wraps one instance and calls step().
+    """
+    def __init__(self, grid=None, n_drones=3, drone_init=None, trace=None, prestage=False,
+                 bays=None, charge_policy=None, log_dir=None):
+        self.grid = map_data.create_floor_plan() if grid is None else grid
+        self.routes = routing.RouteCache()
+        self.planner = cooperative.CooperativePlanner(self.grid, routes=self.routes)
+        self.energy = energy.EnergyTable(self.routes)
+        self.tour_planner = tours.TourPlanner(self.grid, self.routes)
+        self.tasks = logic.TriageQueue()
+        self.demand = staging.DemandModel()
+        # optionally park idle drones where demand is expected
+        self.staging = staging.StagingPolicy(self.routes, self.demand) if prestage else None
+        self.charging = charging.ChargingHub(bays, rate=2.0, policy=charge_policy)
+        self.completed = []  # one dict per delivered task
+        # bounded event log; older events spill to log_dir if given
+        self.events = eventlog.EventLog(spill_dir=log_dir)
+        self.co2_saved = 0.0
+        self.tick = 0
+        self.trace = trace  # optional tracefile.TraceWriter
+
+        # hallway closures: closed cell -> its code before closing
+        self.closures = {}
+        self.grid_version = 0    # bumped by every close/reopen that changes the grid
+        self._stalled = {}       # drone id -> goals it is waiting to reach again
+        self._detoured = set()   # drones rerouted around a closure since their last plan
+
+        if drone_init is None:
+            # extra drones beyond the default three are spread over the hub
+            hub = list(zip(*(self.grid == map_data.ID_HUB).nonzero()))
+            drone_init = [DRONE_INIT[i] if i < len(DRONE_INIT) else hub[i % len(hub)] for i in range(n_drones)]
+
+        self.drones = []
+        for i, (r, c) in enumerate(drone_init):
+            d = backend.Drone(f"D{i+1}", width=self.grid.shape[1], height=self.grid.shape[0])
+            d.xposition = int(c)
+            d.yposition = int(r)
+            d.battery = 100.0
+            self.drones.append({"id": f"D{i+1}", "obj": d, "pos": [int(r), int(c)], "bat": 100.0, "status": "IDLE", "path": [],
+                                "stops": [], "pickup": False})
+
+        # idle, charged drones by position, kept up to date as they move
+        self.index = spatial.DroneIndex(self.grid.shape)
+        for i in range(len(self.drones)):
+            self._index_drone(i)
+
+    def log(self, kind, drone=None, target=None, detail=None):
+        self.events.add(self.tick, kind, drone, target, detail)
+
+    def _record(self, kind, i, aux=0):
+        if self.trace is not None:
+            d = self.drones[i]
+            self.trace.record(self.tick, kind, i, d['pos'][0], d['pos'][1], d['obj'].battery, aux)
+
+    def submit(self, task):
+        self.tasks.push(dict(task, request_tick=self.tick))
+
+    def submit_batch(self, tasks, time_budget=0.05):
+        """Group tasks into multi-stop tours and queue one entry per tour."""
+        entries = []
+        tasks = [dict(t, request_tick=self.tick) for t in tasks]
+        for stops in self.tour_planner.plan(tasks, time_budget):
+            if len(stops) == 1:
+                entries.append(stops[0])
+            else:
+                entries.append(tours.tour_task(stops, self.tour_planner.evaluate(stops)[0]))
+        self.tasks.extend(entries)
+        return entries
+
+    def _apply_replanned(self):
+        # drones whose paths were changed to make room for another drone
+        for d_id, path in self.planner.take_replanned().items():
+            for d in self.drones:
+                if d['id'] == d_id:
+                    d['path'] = list(path)
+                    self._forget_repairs(d_id)
+
+    # hallway closures
+    def close(self, cells):
+        """
+        Close cells (cleaning, spills, patient transfers). They turn into
+        walls for every new plan, and drones already flying through them
+        are replanned around them. Walls and cells with a drone on
+        them are skipped; returns the cells actually closed.
+        """
+        occupied = {tuple(d['pos']) for d in self.drones}
+        changed = []
+        for r, c in cells:
+            cell = (int(r), int(c))
+            if cell in self.closures or cell in occupied or self.grid[cell] == map_data.ID_WALL:
+                continue
+            self.closures[cell] = int(self.grid[cell])
+            self.grid[cell] = map_data.ID_WALL
+            changed.append(cell)
+        if changed:
+            self.grid_version += 1
+            self.log(eventlog.CLOSED, detail=f"{len(changed)} cells")
+            self._closures_changed(changed, closing=True)
+        return changed
+
+    def reopen(self, cells=None):
+        """Reopen closed cells (all of them by default); returns the cells reopened."""
+        cells = list(self.closures) if cells is None else [(int(r), int(c)) for r, c in cells]
+        changed = []
+        for cell in cells:
+            if cell in self.closures:
+                self.grid[cell] = self.closures.pop(cell)
+                changed.append(cell)
+        if changed:
+            self.grid_version += 1
+            self.log(eventlog.REOPENED, detail=f"{len(changed)} cells")
+            self._closures_changed(changed, closing=False)
+        return changed
+
+    def _closures_changed(self, changed, closing):
+        self.routes.sync(self.grid, self.grid_version, changed)
+        self.planner.sync(self.grid, self.grid_version)
+
+        # closing: drones whose route crosses a closed cell; reopening: drones
+        # already detouring, which may have a shorter way back now
+        hit = set(changed)
+        for i, d in enumerate(self.drones):
+            if not d['path'] or d['id'] in self._stalled:
+                continue
+            if (closing and hit.intersection(tuple(c) for c in d['path'])) or (not closing and d['id'] in self._detoured):
+                self._reroute(i)
+        self._retry_stalled()
+
+    def _reroute(self, i, goals=None):
+        # replan drone i through its remaining goals; a drone that can't get
+        # through waits where it is and tries again each tick
+        d = self.drones[i]
+        if goals is None:
+            goals = self.planner.remaining_goals(d['id'], self.tick) or [tuple(d['path'][-1])]
+        planned = self.planner.plan(d['id'], d['pos'], goals, self.tick)
+        if planned is None:
+            return self._hold(i, goals)
+        self._stalled.pop(d['id'], None)
+        self._detoured.add(d['id'])
+        d['path'] = planned
+        self._apply_replanned()
+        self.log(eventlog.REROUTED, d['id'])
+        return True
+
+    def _hold(self, i, goals):
+        # no way through for now: wait a tick in place, and move anyone planned through here
+        d = self.drones[i]
+        self._stalled[d['id']] = goals
+        blocked = self.planner.hold(d['id'], d['pos'], self.tick)
+        d['path'] = [tuple(d['pos'])]
+        for k, other in enumerate(self.drones):
+            if other['id'] in blocked and other['path']:
+                self._reroute(k)
+        return False
+
+    def _forget_repairs(self, d_id):
+        # a new plan replaces the goals a closure left the drone waiting for
+        self._stalled.pop(d_id, None)
+        self._detoured.discard(d_id)
+
+    def _retry_stalled(self):
+        for d_id, goals in list(self._stalled.items()):
+            if self._stalled.get(d_id) is not goals:
+                continue  # replanned by an earlier retry
+            i = next(k for k, d in enumerate(self.drones) if d['id'] == d_id)
+            self._reroute(i, goals)
+
+    def _index_drone(self, i):
+        d = self.drones[i]
+        self.index.update(i, d['pos'], d['status'] == 'IDLE' and d['obj'].battery > 30)
+
+    def _travel(self, target):
+        # dispatch travel to target from flat cells: direct from the hub, via the hub otherwise
+        field = self.routes.distance_field(self.grid, target).astype(float)
+        field[field < 0] = np.inf
+        hub_field = self.routes.distance_field(self.grid, map_data.TARGETS["Hub"]).astype(float)
+        hub_field[hub_field < 0] = np.inf
+        hub_r, hub_c = map_data.TARGETS["Hub"]
+        via_hub = hub_field + field[hub_r * self.grid.shape[1] + hub_c]
+        in_hub = self.grid.ravel() == map_data.ID_HUB
+        return lambda flat: np.where(in_hub[flat], field[flat], via_hub[flat])
+
+    def _nearby_drones(self, candidates):
+        # a task's best drone is among its len(candidates) nearest, so big fleets
+        # only need those per target instead of every available drone
+        if len(self.index) <= NEAREST_SCAN:
+            return sorted(self.index.ids())
+        picked = set()
+        for name in {t['target'] for t in candidates}:
+            target = map_data.TARGETS[name]
+            found = self.index.nearest(target, len(candidates), self._travel(target))
+            picked.update(i for _, i in found)
+        return sorted(picked)
+
+    def _dispatch(self):
+        # multiple deliveries parallely
+        if not self.tasks or not self.index:
+            return
+
+        # tasks is a TriageQueue, so the top few are the candidates for this round
+        n_cand = min(len(self.tasks), len(self.index) * assignment.CANDIDATES_PER_DRONE)
+        candidates = [self.tasks.pop() for _ in range(n_cand)]
+        avail_indices = self._nearby_drones(candidates)
+        if not avail_indices:
+            self.tasks.extend(candidates)
+            return
+
+        # min-cost matching of idle drones to candidate tasks
+        positions = [self.drones[i]['pos'] for i in avail_indices]
+        bat = [self.drones[i]['obj'].battery for i in avail_indices]
+        cost = assignment.dispatch_costs(self.grid, self.routes, positions, candidates)
+
+        # never send a drone on a trip it can't finish and fly home from
+        need = self.energy.required_matrix(self.grid, positions, candidates)
+        lost = ((cost >= assignment.UNREACHABLE) | ~np.isfinite(need)).all(axis=0)
+        short = need > np.array(bat)[:, None]
+        cost[short] = assignment.UNREACHABLE
+        # the most urgent tasks the drones can cover, each on the cheapest drone for it
+        rows, cols = assignment.priority_assignment(cost)
+        pairs = sorted(zip(cols.tolist(), rows.tolist()))  # highest priority task plans first
+
+        # targets no drone can reach and fly home from are dropped
+        for j in np.flatnonzero(lost):
+            self.log(eventlog.PATH_FAILED, target=candidates[j]['target'])
+        leftover = set(range(n_cand)) - {j for j, _ in pairs} - set(np.flatnonzero(lost).tolist())
+        congested = False
+        for j, r in pairs:
+            task = candidates[j]
+            if congested:
+                leftover.add(j)
+                continue
+            sent = self._send(avail_indices[r], task)
+            if sent is None:
+                # hallways are congested, retry next tick
+                congested = True
+                leftover.add(j)
+
+        for j in sorted(leftover):
+            self.tasks.push(candidates[j])
+
+        # idle drones out in the building that can't afford any waiting task go charge
+        for r, i in enumerate(avail_indices):
+            d = self.drones[i]
+            if d['status'] == 'IDLE' and short[r].all() and self.grid[d['pos'][0], d['pos'][1]] != map_data.ID_HUB:
+                self._return_to_hub(i, "Battery too low for queued tasks. Returning to hub.")
+
+    def _send(self, d_idx, task):
+        """Plan and launch one delivery. False if the target is unreachable, None if congested."""
+        drone = self.drones[d_idx]
+        d_obj = drone['obj']
+
+        hub_center = map_data.TARGETS["Hub"]
+        target_loc = map_data.TARGETS[task['target']]
+
+        # pickup at the hub first, then hub to dest (every stop in turn for a tour)
+        stops = task.get('stops', [task])
+        goals = [map_data.TARGETS[s['target']] for s in stops]
+        curr_r, curr_c = int(drone['pos'][0]), int(drone['pos'][1])
+        pickup = self.grid[curr_r, curr_c] != map_data.ID_HUB
+        if pickup:
+            goals.insert(0, hub_center)
+
+        if self.routes.distance(self.grid, drone['pos'], target_loc) is None:
+            self.log(eventlog.PATH_FAILED, drone['id'], task['target'])
+            return False
+
+        # against the current floor plan's rooms, before the drone is touched
+        aux = tracefile.target_index(task['target']) if self.trace is not None else 0
+
+        path = self.planner.plan(drone['id'], drone['pos'], goals, self.tick)
+        if path is None:
+            return None
+
+        self._forget_repairs(drone['id'])
+        drone['path'] = path
+        drone['status'] = f"DELIVERING: {task['item']}"
+        drone['stops'] = list(stops)
+        drone['pickup'] = pickup
+
+        s = backend.Supply(task['item'], task['weight'])
+        d_obj.load_supply(s)
+        self.log(eventlog.DISPATCH, drone['id'], task['target'])
+        self._record(tracefile.DISPATCH, d_idx, aux)
+        self._index_drone(d_idx)
+        self._apply_replanned()
+        return True
+
+    def _return_to_hub(self, i, msg):
+        d = self.drones[i]
+        path = self.planner.plan(d['id'], d['pos'], [map_data.TARGETS["Hub"]], self.tick)
+        if path is None:
+            return False
+        self._forget_repairs(d['id'])
+        d['path'] = path
+        d['status'] = "RETURNING"
+        self._index_drone(i)
+        self.log(eventlog.RETURNING, d['id'], detail=msg)
+        self._record(tracefile.LOW_BATTERY, i)
+        self._apply_replanned()
+        return True
+
+    def _complete(self, i, task):
+        request = task.get('request_tick', self.tick)
+        self.completed.append({"id": task['id'], "request": request, "delivered": self.tick,
+                               "drone": self.drones[i]['id']})
+        self.demand.observe(task['target'], request)
+
+    def latencies(self):
+        """Request-to-delivery ticks for every completed task."""
+        return np.array([c["delivered"] - c["request"] for c in self.completed])
+
+    def _stage(self):
+        # park idle, charged drones where the next request is expected to be cheapest to serve
+        if self.staging is None or self.tasks:
+            return
+        idle = [i for i, d in enumerate(self.drones)
+                if d['status'] == 'IDLE' and not d['path'] and d['obj'].battery >= self.staging.min_battery]
+        stations = self.staging.stations(self.grid, [self.drones[i]['pos'] for i in idle], self.tick)
+        for i, cell in zip(idle, stations):
+            d = self.drones[i]
+            if tuple(d['pos']) != cell:
+                path = self.planner.plan(d['id'], d['pos'], [cell], self.tick)
+                if path:
+                    self._forget_repairs(d['id'])
+                    d['path'] = path
+                    self._apply_replanned()
+
+    def _drop_stops(self, i):
+        # tour stops before the last: leave the item and fly on lighter
+        d = self.drones[i]
+        d_obj = d['obj']
+        pos = tuple(d['pos'])
+        if d['pickup']:
+            d['pickup'] = pos != tuple(map_data.TARGETS["Hub"])
+            return
+        while len(d['stops']) > 1 and pos == tuple(map_data.TARGETS[d['stops'][0]['target']]):
+            stop = d['stops'].pop(0)
+            rest = d_obj.supply.weight - stop['weight'] if d_obj.supply else 0.0
+            d_obj.unload_supply()
+            d_obj.load_supply(backend.Supply(f"{len(d['stops'])} items", rest))
+            self.log(eventlog.DROP, d['id'], stop['target'], stop['item'])
+            self._complete(i, stop)
+
+    def _recall(self):
+        # idle drones out in the building with a low battery fly home; planned
+        # here rather than in _advance so the route starts on this tick's move
+        for i, d in enumerate(self.drones):
+            if d['path'] or d['status'] not in ("IDLE", "CHARGING"):
+                continue
+            if self.grid[d['pos'][0], d['pos'][1]] != map_data.ID_HUB and d['obj'].battery < 30:
+                self._return_to_hub(i, "Battery Low (<30% remaining). Returning to hub.")
+
+    def _advance(self):
+        # drone states
+        any_moving = False
+        need = None
+        if self.tasks:
+            # battery the next queued task needs from the hub, for partial charging
+            need = self.energy.required(self.grid, map_data.TARGETS["Hub"], self.tasks.peek())
+        level = self.charging.release_level(need)
+
+        for i, d in enumerate(self.drones):
+            d_obj = d['obj']
+            curr_r, curr_c = int(d['pos'][0]), int(d['pos'][1])
+            in_hub = (self.grid[curr_r, curr_c] == map_data.ID_HUB)
+
+            # moving?
+            if d['path']:
+                any_moving = True
+                self.charging.release(d['id'])
+                next_step = d['path'].pop(0)
+
+                # update backend
+                dy = next_step[0] - d_obj.yposition
+                dx = next_step[1] - d_obj.xposition
+                cmd = DIRS.get((dy, dx))
+
+                # repeated cell = waiting for a hallway to clear
+                if cmd:
+                    d_obj.set_command(cmd)
+                    d_obj.update()
+                    self.co2_saved += 0.05
+
+                d['pos'] = [d_obj.yposition, d_obj.xposition]
+                d['bat'] = d_obj.battery
+                self._record(tracefile.STEP, i)
+                if len(d['stops']) > 1:
+                    self._drop_stops(i)
+                self._index_drone(i)
+                continue
+
+            # task done
+            if d['status'].startswith("DELIVERING"):
+                d['status'] = "IDLE"
+                last = d['stops'][-1]['target'] if d['stops'] else None
+                for stop in d['stops']:
+                    self._complete(i, stop)
+                d['stops'] = []
+                d_obj.unload_supply()
+                self.log(eventlog.DELIVERY, d['id'], last)
+                self._record(tracefile.DELIVERY, i)
+
+            # return
+            elif d['status'] == "RETURNING":
+                d['status'] = "IDLE"
+                self.log(eventlog.RETURNED, d['id'], "Hub")
+                self._record(tracefile.RETURNED, i)
+
+            # returning/charging
+            elif d['status'] == "IDLE" or d['status'] == "CHARGING":
+
+                # if at hub and below the release level then CHARGE, once a bay is free
+                if in_hub and d_obj.battery < level:
+                    if self.charging.request(d['id'], self.tick):
+                        d['status'] = "CHARGING"
+                        d_obj.battery = self.charging.charge(d_obj.battery)
+                        d['bat'] = d_obj.battery
+                        self._record(tracefile.CHARGE, i)
+                    else:
+                        d['status'] = "IDLE"  # queued for a bay
+
+                # if at hub and charged enough then IDLE
+                elif in_hub:
+                    self.charging.release(d['id'])
+                    if d['status'] == "CHARGING":
+                        self._record(tracefile.CHARGED, i)
+                    d['status'] = "IDLE"
+
+            self._index_drone(i)
+
+        return any_moving
+
+    def step(self, n=1):
+        """Advance n ticks. Returns whether any drone moved on the last one."""
+        any_moving = False
+        for _ in range(n):
+            if self.trace is not None and self.tick % self.trace.keyframe_every == 0:
+                self.trace.keyframe(self.tick, self.drones)
+            self.planner.prune(self.tick)
+            self._recall()
+            self._dispatch()
+            self._stage()
+            self._retry_stalled()
+            any_moving = self._advance()
+            self.tick += 1
+        return any_moving
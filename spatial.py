@@ -0,0 +1,105 @@
+import heapq
+import numpy as np
+
+
+class DroneIndex:
+    """
+    Uniform-grid bucket index over the drones that are available for work.
+
+    Drones are filed by position into square buckets of `bucket` cells and
+    moved between buckets as they fly, so an update is O(1). nearest()
+    walks rings of buckets outwards from the query cell; the Manhattan gap
+    to a ring is a lower bound on travel distance, so the search stops as
+    soon as the k-th best real travel distance is no worse than anything
+    further out could be.
+    """
+    def __init__(self, shape, bucket=4):
+        self.rows, self.cols = shape
+        self.bucket = bucket
+        self.n_brows = -(-self.rows // bucket)
+        self.n_bcols = -(-self.cols // bucket)
+        self.buckets = {}   # (bucket row, bucket col) -> set of drone ids
+        self.where = {}     # drone id -> (cell, bucket)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, drone):
+        return drone in self.where
+
+    def ids(self):
+        return list(self.where)
+
+    def _key(self, cell):
+        return (int(cell[0]) // self.bucket, int(cell[1]) // self.bucket)
+
+    def update(self, drone, cell, available=True):
+        """File drone at cell, or drop it from the index if it isn't available."""
+        if not available:
+            self.remove(drone)
+            return
+        cell = (int(cell[0]), int(cell[1]))
+        old = self.where.get(drone)
+        key = self._key(cell)
+        if old is not None and old[1] != key:
+            self._unfile(drone, old[1])
+        if old is None or old[1] != key:
+            self.buckets.setdefault(key, set()).add(drone)
+        self.where[drone] = (cell, key)
+
+    def remove(self, drone):
+        old = self.where.pop(drone, None)
+        if old is not None:
+            self._unfile(drone, old[1])
+
+    def _unfile(self, drone, key):
+        members = self.buckets[key]
+        members.discard(drone)
+        if not members:
+            del self.buckets[key]
+
+    def _ring(self, center, r):
+        br, bc = center
+        if r == 0:
+            yield center
+            return
+        for c in range(bc - r, bc + r + 1):
+            yield (br - r, c)
+            yield (br + r, c)
+        for row in range(br - r + 1, br + r):
+            yield (row, bc - r)
+            yield (row, bc + r)
+
+    def nearest(self, cell, k, travel):
+        """
+        The k available drones closest to cell as [(distance, drone), ...],
+        nearest first. travel(flat cell indices) gives the real travel
+        distance for each (inf if unreachable); it must never be less than
+        the Manhattan distance.
+        """
+        if k <= 0 or not self.where:
+            return []
+        center = self._key(cell)
+        best = []  # max-heap of (-distance, drone)
+        max_ring = max(self.n_brows, self.n_bcols)
+        seen = 0
+        for r in range(max_ring + 1):
+            drones, cells = [], []
+            for key in self._ring(center, r):
+                for drone in self.buckets.get(key, ()):
+                    drones.append(drone)
+                    cells.append(self.where[drone][0])
+            seen += len(drones)
+            if drones:
+                flat = np.array([rr * self.cols + cc for rr, cc in cells], dtype=np.int64)
+                for dist, drone in zip(np.asarray(travel(flat), dtype=float).tolist(), drones):
+                    if dist == float("inf"):
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, drone))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, drone))
+            # everything in ring r+1 is at least r * bucket + 1 steps away
+            if seen == len(self.where) or (len(best) == k and -best[0][0] <= r * self.bucket + 1):
+                break
+        return sorted((-d, drone) for d, drone in best)
@@ -0,0 +1,104 @@
+import numpy as np
+import grid as map_data
+import assignment
+
+
+class DemandModel:
+    """
+    Request counts per target and time of day, learned from completed tasks.
+    Ticks are seconds, so the default is 24 hourly bins; a bin with little
+    history leans on the all-day target mix.
+    """
+    def __init__(self, targets=None, bins=24, ticks_per_bin=3600, prior=5.0):
+        if targets is None:
+            targets = [k for k in map_data.TARGETS if k != "Hub"]
+        self.targets = list(targets)
+        self._col = {name: j for j, name in enumerate(self.targets)}
+        self.bins = bins
+        self.ticks_per_bin = ticks_per_bin
+        self.prior = prior
+        self.counts = np.zeros((bins, len(self.targets)))
+
+    def bin(self, tick):
+        return (int(tick) // self.ticks_per_bin) % self.bins
+
+    def observe(self, target, tick):
+        """Count one request for target made at tick."""
+        if target not in self._col:
+            return
+        self.counts[self.bin(tick), self._col[target]] += 1
+
+    def mix(self, tick):
+        """Probability that the next request at tick is for each target."""
+        overall = self.counts.sum(axis=0) + 1.0
+        overall /= overall.sum()
+        row = self.counts[self.bin(tick)]
+        return (row + self.prior * overall) / (row.sum() + self.prior)
+
+
+class StagingPolicy:
+    """
+    Parks idle, charged drones where the next request is expected to be
+    quickest to serve.
+
+    The expected response from a cell is the dispatcher's travel to each
+    target (straight there from inside the hub, via the hub pickup from
+    anywhere else) weighted by the DemandModel's target mix for the hour.
+    Because every trip starts with the hub pickup, a hallway cell is never
+    better than a hub cell, and parking in a one-cell hallway would block
+    traffic, so only hub cells are candidates unless `kinds` says otherwise.
+    """
+    def __init__(self, routes, demand, hub=None, min_battery=60.0, kinds=(map_data.ID_HUB,), refresh=300):
+        self.routes = routes
+        self.demand = demand
+        self.hub = tuple(map_data.TARGETS["Hub"] if hub is None else hub)
+        self.min_battery = min_battery
+        self.kinds = tuple(kinds)
+        self.refresh = refresh  # ticks between re-ranking the parking cells
+        self._ranked = (None, None)
+
+    def expected_response(self, grid, tick):
+        """Expected dispatch steps from every flat cell (inf where drones don't park)."""
+        flat = np.asarray(grid).ravel()
+        cols = grid.shape[1]
+        hub_field = self.routes.distance_field(grid, self.hub).astype(float)
+        hub_field[hub_field < 0] = np.inf
+        direct = np.zeros(flat.size)
+        via_hub = np.zeros(flat.size)
+        for p, name in zip(self.demand.mix(tick), self.demand.targets):
+            field = self.routes.distance_field(grid, map_data.TARGETS[name]).astype(float)
+            field[field < 0] = np.inf
+            direct += p * field
+            via_hub += p * (hub_field + field[self.hub[0] * cols + self.hub[1]])
+        expected = np.where(flat == map_data.ID_HUB, direct, via_hub)
+        expected[~np.isin(flat, self.kinds)] = np.inf
+        return expected
+
+    def ranked(self, grid, tick):
+        """Parking cells (flat indices) from best to worst, re-ranked every `refresh` ticks."""
+        key = (int(tick) // self.refresh, self.demand.bin(tick), grid.shape)
+        if self._ranked[0] != key:
+            expected = self.expected_response(grid, tick)
+            ok = np.flatnonzero(np.isfinite(expected))
+            self._ranked = (key, ok[np.argsort(expected[ok], kind="stable")])
+        return self._ranked[1]
+
+    def stations(self, grid, positions, tick):
+        """A parking cell for each drone at positions (cells are reused if there are too few)."""
+        if not positions:
+            return []
+        best = self.ranked(grid, tick)
+        cols = grid.shape[1]
+        parked = {int(r) * cols + int(c) for r, c in positions}
+        if not best.size or parked == set(best[:len(positions)].tolist()):
+            return [tuple(p) for p in positions]  # nowhere to go, or already on the best cells
+        cells = np.resize(best[:len(positions)], len(positions))
+
+        # hand the cells out with the least total movement (grid distance)
+        pos = np.array(positions, dtype=np.int64)
+        cost = np.abs(pos[:, 0, None] - cells[None, :] // cols) + np.abs(pos[:, 1, None] - cells[None, :] % cols)
+        rows, picked = assignment.hungarian(cost)
+        out = [None] * len(positions)
+        for r, j in zip(rows.tolist(), picked.tolist()):
+            out[r] = (int(cells[j] // cols), int(cells[j] % cols))
+        return out
@@ -0,0 +1,197 @@
+"""
+Monte Carlo sweeps over fleet parameters.
+
+Every combination of the parameter grid is run for several seeded
+replicas across a process pool, and aggregated latency / throughput /
+battery statistics are written one row per scenario to a columnar .npz
+file (one array per column, including which engine produced it).
+
+Two engines, neither of them Simulation itself:
+  fleet  fleet.Fleet: Simulation's dispatcher (matching, energy admission,
+         recall) with no collision avoidance, so drones never wait for each
+         other and latencies are optimistic for busy hallways. Only the
+         floor plan's hub.
+  des    des.EventSimulation: the dashboard's original first-idle-drone
+         dispatcher, no energy admission. Sweeps hub placement, but its
+         drones can run flat; stranded_drones is always 0 under fleet.
+
+    python sweep.py --drones 3 5 8 --threshold 20 30 --charge-rate 2 4 \\
+        --rate 0.02 --ticks 86400 --replicas 4 --out sweep.npz
+    python sweep.py --engine des --hub 2,2 8,4 --out hubs.npz
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import grid as map_data
+import des
+import fleet
+
+# CTAS / urgency / weight-class mix of incoming requests (same classes as the dashboard form)
+WEIGHT_CLASSES = [0.4, 1.5, 3.5, 10.0, 30.0, 60.0]
+WEIGHT_PROBS = [0.30, 0.30, 0.20, 0.15, 0.04, 0.01]
+CTAS_PROBS = [0.05, 0.15, 0.35, 0.30, 0.15]
+
+
+def synthetic_requests(rng, ticks, rate, targets=None, target_probs=None):
+    """
+    Poisson request arrivals at `rate` requests per tick over [0, ticks).
+    Returns a list of (tick, payload) in arrival order.
+    """
+    if targets is None:
+        targets = [k for k in map_data.TARGETS if k != "Hub"]
+    n = rng.poisson(rate * ticks)
+    arrivals = np.sort(rng.integers(0, ticks, size=n))
+    dest = rng.choice(len(targets), size=n, p=target_probs)
+    ctas = rng.choice(5, size=n, p=CTAS_PROBS) + 1
+    urgency = rng.integers(1, 6, size=n)
+    weight = rng.choice(WEIGHT_CLASSES, size=n, p=WEIGHT_PROBS)
+    return [
+        (int(t), {"id": str(i), "item": "Medical Supplies", "target": targets[d], "urgency": int(u),
+                  "ctas": int(c), "weight": float(w), "arrival_time": float(t)})
+        for i, (t, d, c, u, w) in enumerate(zip(arrivals, dest, ctas, urgency, weight))
+    ]
+
+
+def run_scenario(job):
+    """Run one replica; job is (scenario index, params dict, seed)."""
+    index, params, seed = job
+    rng = np.random.default_rng(seed)
+    requests = synthetic_requests(rng, params["ticks"], params["rate"])
+    if params["engine"] == "fleet":
+        return index, _run_fleet(params, requests)
+    sim = des.EventSimulation(n_drones=params["drones"], threshold=params["threshold"],
+                              charge_rate=params["charge_rate"], hub=params["hub"])
+    for t, task in requests:
+        sim.submit(task, t)
+    sim.run(params["ticks"])
+    return index, {
+        "latency": sim.latencies(),
+        "requested": len(requests),
+        "delivered": len(sim.completed),
+        "min_bat": min([c["bat"] for c in sim.completed], default=100.0),
+        "stranded": sum(d["bat"] <= 0 for d in sim.drones),
+        "events": sim.processed,
+    }
+
+
+def _run_fleet(params, requests):
+    sim = fleet.Fleet(params["drones"], threshold=params["threshold"], charge_rate=params["charge_rate"])
+    pending = iter(requests)
+    nxt = next(pending, None)
+    min_bat = 100.0
+    for tick in range(params["ticks"]):
+        while nxt is not None and nxt[0] <= tick:
+            sim.submit(nxt[1])
+            nxt = next(pending, None)
+        done = len(sim.completed)
+        sim.step()
+        # battery on arrival, as the event simulator records it
+        for c in sim.completed[done:]:
+            min_bat = min(min_bat, sim.battery[int(c["drone"][1:]) - 1])
+    return {
+        "latency": sim.latencies(),
+        "requested": len(requests),
+        "delivered": len(sim.completed),
+        "min_bat": float(min_bat),
+        "stranded": int((sim.battery <= 0).sum()),
+        "events": sim.tick,
+    }
+
+
+def aggregate(params, replicas):
+    lat = np.concatenate([r["latency"] for r in replicas]) if replicas else np.array([])
+    ticks = params["ticks"] * len(replicas)
+    has = lat.size > 0
+    return {
+        "latency_p50": float(np.percentile(lat, 50)) if has else np.nan,
+        "latency_p95": float(np.percentile(lat, 95)) if has else np.nan,
+        "latency_mean": float(lat.mean()) if has else np.nan,
+        "throughput_per_1k_ticks": 1000.0 * sum(r["delivered"] for r in replicas) / ticks,
+        "completion_rate": sum(r["delivered"] for r in replicas) / max(1, sum(r["requested"] for r in replicas)),
+        "min_battery": min(r["min_bat"] for r in replicas),
+        "stranded_drones": float(np.mean([r["stranded"] for r in replicas])),
+    }
+
+
+def sweep(grid_params, ticks, rate, replicas, seed=0, workers=None, engine="fleet"):
+    """Returns (scenario params list, per-scenario stats list)."""
+    keys = list(grid_params)
+    scenarios = [dict(zip(keys, combo), ticks=ticks, rate=rate, engine=engine)
+                 for combo in itertools.product(*(grid_params[k] for k in keys))]
+    if engine == "fleet" and any(tuple(s["hub"]) != tuple(map_data.TARGETS["Hub"]) for s in scenarios):
+        raise ValueError("hub placement is only swept by the des engine")
+    seeds = np.random.SeedSequence(seed).spawn(len(scenarios) * replicas)
+    jobs = [(i, s, seeds[i * replicas + r]) for i, s in enumerate(scenarios) for r in range(replicas)]
+
+    results = [[] for _ in scenarios]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for index, res in pool.map(run_scenario, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))):
+            results[index].append(res)
+    return scenarios, [aggregate(s, r) for s, r in zip(scenarios, results)]
+
+
+def write_columns(path, scenarios, stats):
+    columns = {
+        "drones": np.array([s["drones"] for s in scenarios]),
+        "threshold": np.array([s["threshold"] for s in scenarios], dtype=float),
+        "charge_rate": np.array([s["charge_rate"] for s in scenarios], dtype=float),
+        "hub_row": np.array([s["hub"][0] for s in scenarios]),
+        "hub_col": np.array([s["hub"][1] for s in scenarios]),
+        "ticks": np.array([s["ticks"] for s in scenarios]),
+        "rate": np.array([s["rate"] for s in scenarios], dtype=float),
+        "engine": np.array([s["engine"] for s in scenarios]),
+    }
+    for key in stats[0]:
+        columns[key] = np.array([s[key] for s in stats], dtype=float)
+    np.savez_compressed(path, **columns)
+    return columns
+
+
+def _cell(text):
+    r, c = text.split(",")
+    return (int(r), int(c))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--drones", type=int, nargs="+", default=[3])
+    p.add_argument("--threshold", type=float, nargs="+", default=[30.0])
+    p.add_argument("--charge-rate", type=float, nargs="+", default=[2.0])
+    p.add_argument("--hub", type=_cell, nargs="+", default=[tuple(map_data.TARGETS["Hub"])],
+                   help="hub cells as row,col")
+    p.add_argument("--ticks", type=int, default=24 * 3600)
+    p.add_argument("--rate", type=float, default=0.02, help="requests per tick")
+    p.add_argument("--replicas", type=int, default=4)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--out", default="sweep_results.npz")
+    p.add_argument("--engine", choices=("fleet", "des"), default="fleet",
+                   help="des: event-driven, first idle drone; fleet: vectorized Simulation dispatcher")
+    args = p.parse_args(argv)
+    if args.engine == "fleet" and any(h != tuple(map_data.TARGETS["Hub"]) for h in args.hub):
+        p.error("--hub other than the floor plan's hub needs --engine des")
+
+    grid_params = {"drones": args.drones, "threshold": args.threshold,
+                   "charge_rate": args.charge_rate, "hub": args.hub}
+    t0 = time.perf_counter()
+    scenarios, stats = sweep(grid_params, args.ticks, args.rate, args.replicas, args.seed, args.workers,
+                             args.engine)
+    write_columns(args.out, scenarios, stats)
+
+    print(f"{len(scenarios)} scenarios x {args.replicas} replicas in {time.perf_counter() - t0:.1f} s -> {args.out}")
+    if args.engine == "fleet":
+        print("engine fleet: Simulation's dispatcher without collision avoidance (no hallway waits)")
+    else:
+        print("engine des: original first-idle-drone dispatcher, no energy admission (drones can run flat)")
+    for s, r in zip(scenarios, stats):
+        print(f"drones={s['drones']:<3} thr={s['threshold']:<5g} charge={s['charge_rate']:<4g} hub={s['hub']} | "
+              f"p50={r['latency_p50']:.0f} p95={r['latency_p95']:.0f} "
+              f"thru={r['throughput_per_1k_ticks']:.1f}/1k ticks done={r['completion_rate']:.1%} "
+              f"min_bat={r['min_battery']:.1f} stranded={r['stranded_drones']:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import io
+import contextlib
+import itertools
+import numpy as np
+import pytest
+import assignment
+import simulation
+
+
+def brute_force(cost):
+    """Cheapest total over every way of matching all rows (or all columns)."""
+    n, m = cost.shape
+    if n <= m:
+        return min(cost[np.arange(n), list(cols)].sum() for cols in itertools.permutations(range(m), n))
+    return min(cost[list(rows), np.arange(m)].sum() for rows in itertools.permutations(range(n), m))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_hungarian_matches_brute_force(seed):
+    rng = np.random.RandomState(seed)
+    n, m = rng.randint(1, 7, 2)
+    # small integer costs give plenty of ties
+    cost = rng.randint(0, 10, (n, m)).astype(float)
+    if seed % 4 == 0:
+        cost[rng.rand(n, m) < 0.3] = assignment.UNREACHABLE
+    rows, cols = assignment.hungarian(cost)
+    assert len(rows) == min(n, m)
+    assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+    assert list(rows) == sorted(rows)
+    assert cost[rows, cols].sum() == brute_force(cost)
+
+
+def test_hungarian_empty():
+    rows, cols = assignment.hungarian(np.zeros((0, 3)))
+    assert len(rows) == len(cols) == 0
+
+
+def coverable(feasible, cols):
+    """Some drone for each of cols, no drone twice."""
+    return any(all(feasible[r, j] for r, j in zip(rows, cols))
+               for rows in itertools.permutations(range(feasible.shape[0]), len(cols)))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_priority_columns_never_skip_a_task(seed):
+    rng = np.random.RandomState(seed)
+    n, m = rng.randint(1, 6), rng.randint(1, 8)
+    feasible = rng.rand(n, m) < rng.choice([0.2, 0.5, 0.9])
+    taken = assignment.priority_columns(feasible).tolist()
+    assert taken == sorted(taken) and len(taken) <= n
+    assert coverable(feasible, taken)
+    # every task left out, ahead of the last one taken or while drones were free,
+    # could not have been covered along with the tasks before it
+    for j in range(m):
+        if j not in taken and (len(taken) < n or j < taken[-1]):
+            assert not coverable(feasible, [k for k in taken if k < j] + [j])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_priority_assignment_cheapest_for_its_tasks(seed):
+    rng = np.random.RandomState(seed)
+    n, m = rng.randint(1, 6), rng.randint(1, 8)
+    cost = rng.randint(0, 20, (n, m)).astype(float)
+    cost[rng.rand(n, m) < 0.3] = assignment.UNREACHABLE
+    rows, cols = assignment.priority_assignment(cost)
+    assert sorted(cols.tolist()) == assignment.priority_columns(cost < assignment.UNREACHABLE).tolist()
+    assert (cost[rows, cols] < assignment.UNREACHABLE).all()
+    assert cost[rows, cols].sum() == brute_force(cost[:, sorted(cols.tolist())])
+
+
+def test_urgent_task_goes_before_a_closer_routine_one():
+    sim = simulation.Simulation(n_drones=1)
+    # the OR is the far corner of the floor, the ICU is next to the hub
+    sim.submit({"id": "urgent", "item": "Blood", "target": "OR", "urgency": 5, "ctas": 2,
+                "weight": 1.0, "arrival_time": 0.0})
+    sim.submit({"id": "routine", "item": "Gauze", "target": "ICU", "urgency": 1, "ctas": 5,
+                "weight": 1.0, "arrival_time": 0.0})
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.step(200)
+    assert [c["id"] for c in sim.completed] == ["urgent", "routine"]
@@ -0,0 +1,69 @@
+import math
+import pytest
+import charging
+
+
+def test_bay_limit_and_fifo():
+    hub = charging.ChargingHub(bays=2)
+    assert [hub.request(d, 0) for d in ("a", "b", "c", "d")] == [True, True, False, False]
+    assert list(hub.queue) == ["c", "d"]
+    assert hub.free_bays() == 0
+    # queued drones asking again don't jump the line
+    assert not hub.request("d", 1)
+    assert list(hub.queue) == ["c", "d"]
+
+    hub.release("a")
+    assert not hub.request("d", 2)
+    assert hub.request("c", 2)
+    hub.release("b")
+    assert hub.request("d", 3)
+    assert set(hub.holding) == {"c", "d"} and not hub.queue
+
+
+def test_release_from_queue():
+    hub = charging.ChargingHub(bays=1)
+    hub.request("a", 0)
+    hub.request("b", 0)
+    hub.request("c", 0)
+    hub.release("b")  # left the queue without charging
+    hub.release("a")
+    assert hub.request("c", 1)
+    assert hub.waits == [0, 1]
+
+
+def test_unlimited_bays():
+    hub = charging.ChargingHub()
+    assert all(hub.request(str(k), 0) for k in range(50))
+    assert hub.free_bays() == float("inf")
+    assert math.isnan(hub.metrics()["utilization"])
+
+
+def test_charge_caps_at_full():
+    hub = charging.ChargingHub(rate=3.0)
+    assert hub.charge(50.0) == 53.0
+    assert hub.charge(99.0) == 100.0
+
+
+@pytest.mark.parametrize("need,level", [(None, 100.0), (float("inf"), 100.0), (10.0, 40.0),
+                                        (50.0, 55.0), (98.0, 100.0)])
+def test_need_charge_release_level(need, level):
+    hub = charging.ChargingHub(policy=charging.NeedCharge(floor=40.0, margin=5.0))
+    assert hub.release_level(need) == level
+    assert charging.ChargingHub().release_level(need) == 100.0
+
+
+def test_metrics():
+    hub = charging.ChargingHub(bays=2)
+    for tick in range(10):
+        for d in ("a", "b", "c"):
+            if d == "a" and tick >= 4:
+                hub.release(d)
+            else:
+                hub.request(d, tick)
+    m = hub.metrics()
+    # a charges ticks 0-3, b all ten, c waits four ticks then charges 4-9
+    assert m["sessions"] == 3
+    assert m["utilization"] == pytest.approx((4 + 10 + 6) / (2 * 10))
+    assert (m["charging"], m["queued"], m["max_queue"]) == (2, 0, 1)
+    assert m["mean_wait"] == pytest.approx(4 / 3)
+    assert m["p95_wait"] == pytest.approx(3.6)
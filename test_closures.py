@@ -0,0 +1,37 @@
+import io
+import contextlib
+import grid as map_data
+import simulation
+
+
+def test_new_task_replaces_stalled_goal():
+    sim = simulation.Simulation(n_drones=1)
+    d = sim.drones[0]
+    # park the idle drone out in the east hallway, like the staging policy does
+    d['path'] = sim.planner.plan(d['id'], d['pos'], [(4, 16)], sim.tick)
+    while tuple(d['pos']) != (4, 8):
+        sim.step()
+
+    # wall off its parking spot: it waits for the cell to reopen
+    assert sim.close([(4, c) for c in range(12, 20)])
+    assert sim._stalled
+
+    sim.submit({"id": "t1", "item": "Medical Supplies", "target": "ICU", "urgency": 3,
+                "ctas": 2, "weight": 1.0, "arrival_time": 0.0})
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(80):
+            sim.step()
+    assert [c["id"] for c in sim.completed] == ["t1"]
+    assert tuple(d['pos']) == map_data.TARGETS["ICU"]
+    assert not sim._stalled
+
+
+def test_grid_version_counts_changes():
+    sim = simulation.Simulation(n_drones=1)
+    assert sim.grid_version == 0
+    assert sim.close([(4, 10), (0, 5)]) == [(4, 10)]  # (0, 5) is a wall
+    assert sim.close([(4, 10)]) == []  # already closed: no change
+    assert sim.grid_version == 1
+    sim.reopen()
+    sim.reopen()
+    assert sim.grid_version == 2
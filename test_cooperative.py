@@ -0,0 +1,72 @@
+import io
+import contextlib
+import numpy as np
+import pytest
+import grid as map_data
+import simulation
+import sweep
+
+
+def collisions(sim, ticks, rate, seed=0, close_every=None):
+    """
+    Run sim on synthetic requests and count ticks where two drones share a
+    hallway cell or swap places across one.
+    """
+    rng = np.random.default_rng(seed)
+    pending = iter(sweep.synthetic_requests(rng, ticks, rate))
+    nxt = next(pending, None)
+    hallway = sim.grid == map_data.ID_HALLWAY
+    hall_cells = [tuple(c) for c in np.argwhere(hallway).tolist()]
+    prev = {d['id']: tuple(d['pos']) for d in sim.drones}
+    shared, swaps = [], []
+    with contextlib.redirect_stdout(io.StringIO()):  # backend.Drone prints every load
+        for tick in range(ticks):
+            while nxt is not None and nxt[0] <= tick:
+                sim.submit(nxt[1])
+                nxt = next(pending, None)
+            if close_every and tick % close_every == close_every // 4:
+                here = {tuple(d['pos']) for d in sim.drones}
+                free = [c for c in hall_cells if c not in here]
+                sim.close([free[k] for k in rng.choice(len(free), 3, replace=False)])
+            elif close_every and tick % close_every == 3 * close_every // 4:
+                sim.reopen()
+            sim.step()
+
+            cur = {d['id']: tuple(int(v) for v in d['pos']) for d in sim.drones}
+            seen = {}
+            for d_id, cell in cur.items():
+                if hallway[cell]:
+                    if cell in seen:
+                        shared.append((tick, seen[cell], d_id, cell))
+                    seen[cell] = d_id
+            ids = list(cur)
+            for k, a in enumerate(ids):
+                for b in ids[k + 1:]:
+                    if cur[a] != cur[b] and cur[a] == prev[b] and cur[b] == prev[a] \
+                            and (hallway[cur[a]] or hallway[cur[b]]):
+                        swaps.append((tick, a, b))
+            prev = cur
+    return shared, swaps
+
+
+@pytest.mark.parametrize("drones", [5, 30])
+def test_no_collisions(drones):
+    sim = simulation.Simulation(n_drones=drones)
+    shared, swaps = collisions(sim, 3000, 0.3)
+    assert shared == []
+    assert swaps == []
+    assert len(sim.completed) > 0
+
+
+def test_no_collisions_prestaged():
+    sim = simulation.Simulation(n_drones=10, prestage=True, bays=2)
+    shared, swaps = collisions(sim, 2000, 0.05, seed=1)
+    assert shared == []
+    assert swaps == []
+
+
+def test_no_collisions_with_closures():
+    sim = simulation.Simulation(n_drones=12)
+    shared, swaps = collisions(sim, 1500, 0.15, seed=5, close_every=50)
+    assert shared == []
+    assert swaps == []
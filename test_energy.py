@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import backend
+import energy
+import grid as map_data
+import routing
+
+
+def exact_need(grid, fields, pos, target, mult, reserve):
+    """Battery for this one cell: out (via the hub unless in it) loaded, back to the hub empty."""
+    hub = map_data.TARGETS["Hub"]
+    to_target = fields[target]
+    if grid[pos] == map_data.ID_HUB:
+        out = to_target[pos]
+    else:
+        out = fields[hub][pos] + to_target[hub]
+    back = to_target[hub]
+    return energy.DRAIN * (mult * out + back) + reserve
+
+
+@pytest.mark.parametrize("weight", [0.2, 1.0, 3.0, 10.0])
+def test_required_is_worst_case_over_region(weight, bfs):
+    grid = map_data.create_floor_plan()
+    table = energy.EnergyTable(routing.RouteCache())
+    mult = backend.weight_to_multiplier(weight)
+    cells = [tuple(c) for c in np.argwhere(grid != map_data.ID_WALL).tolist()]
+    fields = {tuple(t): bfs(grid, tuple(t)) for t in map_data.TARGETS.values()}
+    for name, target in map_data.TARGETS.items():
+        task = {"target": name, "weight": weight}
+        worst = {}
+        for pos in cells:
+            need = exact_need(grid, fields, pos, target, mult, table.reserve)
+            worst[grid[pos]] = max(worst.get(grid[pos], 0.0), need)
+        for pos in cells:
+            got = table.required(grid, pos, task)
+            assert got >= exact_need(grid, fields, pos, target, mult, table.reserve)
+            assert got == pytest.approx(worst[grid[pos]])
+
+
+def test_matrix_matches_required_after_edit():
+    grid = map_data.create_floor_plan()
+    table = energy.EnergyTable(routing.RouteCache())
+    tasks = [{"target": name, "weight": w} for name in map_data.TARGETS for w in (0.2, 4.0)]
+    positions = [(2, 2), (4, 9), (14, 2), (12, 12), (18, 15)]
+    before = table.required_matrix(grid, positions, tasks)
+    # cut the middle hallway: some trips get longer and the table has to notice
+    cut = [(8, c) for c in range(grid.shape[1]) if c != 4 and grid[8, c] != map_data.ID_WALL]
+    for cell in cut:
+        grid[cell] = map_data.ID_WALL
+    table.routes.sync(grid, 1, cut)
+    after = table.required_matrix(grid, positions, tasks)
+    assert (after >= before).all() and (after > before).any()
+    for i, pos in enumerate(positions):
+        for j, task in enumerate(tasks):
+            assert after[i, j] == table.required(grid, pos, task)
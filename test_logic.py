@@ -0,0 +1,84 @@
+import random
+import pytest
+import logic
+
+
+def task(i, ctas=3, urgency=3, arrival=0.0):
+    return {"id": str(i), "ctas": ctas, "urgency": urgency, "arrival_time": arrival}
+
+
+def random_tasks(rng, n):
+    return [task(i, rng.randint(1, 5), rng.randint(1, 5), float(rng.randint(0, 600))) for i in range(n)]
+
+
+def test_pop_order_matches_triage_key():
+    rng = random.Random(0)
+    tasks = random_tasks(rng, 300)
+    queue = logic.TriageQueue()
+    for t in tasks:
+        queue.push(t)
+    assert len(queue) == 300
+    assert queue.peek() is min(tasks, key=logic.triage_key)
+    popped = [queue.pop() for _ in range(300)]
+    # ties keep the order they were queued in
+    assert popped == sorted(tasks, key=logic.triage_key)
+    assert not queue
+    with pytest.raises(IndexError):
+        queue.pop()
+    with pytest.raises(IndexError):
+        queue.peek()
+
+
+@pytest.mark.parametrize("n", [5, 200])
+def test_extend_matches_pushes(n):
+    # small batches go in as pushes, large ones re-heapify
+    rng = random.Random(n)
+    queued = [dict(t, id="q" + t["id"]) for t in random_tasks(rng, 100)]
+    tasks = random_tasks(rng, n)
+    queue = logic.TriageQueue(queued)
+    queue.extend(tasks)
+    assert list(queue) == sorted(queued + tasks, key=logic.triage_key)
+
+
+def test_ctas1_always_first_ordered_by_score():
+    queue = logic.TriageQueue([task("a", 2, urgency=5), task("b", 1, urgency=1, arrival=60.0),
+                               task("c", 1, urgency=5, arrival=60.0), task("d", 3)])
+    # CTAS 1 ahead of everything, then by score among themselves (c's higher urgency wins),
+    # not most recently added first as the old insertion sort did
+    assert [queue.pop()["id"] for _ in range(4)] == ["c", "b", "a", "d"]
+
+
+def test_remove_is_lazy():
+    tasks = [task(i, ctas=2, urgency=i % 5) for i in range(10)]
+    queue = logic.TriageQueue(tasks)
+    head = queue.peek()
+    assert queue.remove(head["id"]) is head
+    assert head["id"] not in queue and len(queue) == 9
+    assert queue.peek() is not head
+    assert [queue.pop()["id"] for _ in range(9)] == [t["id"] for t in sorted(tasks, key=logic.triage_key)
+                                                     if t is not head]
+    with pytest.raises(KeyError):
+        queue.remove(head["id"])
+
+
+def test_duplicate_ids_rejected():
+    queue = logic.TriageQueue([task(1), task(2)])
+    with pytest.raises(ValueError):
+        queue.push(task(1))
+    # a bad batch adds nothing, whether the duplicate is queued already or inside the batch
+    with pytest.raises(ValueError):
+        queue.extend([task(3), task(1)])
+    with pytest.raises(ValueError):
+        queue.extend([task(4), task(4)])
+    assert len(queue) == 2 and "3" not in queue and "4" not in queue
+    # a removed id can be queued again
+    queue.remove("1")
+    queue.push(task(1))
+    assert "1" in queue
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 400])
+def test_prioritize_matches_sort(n):
+    rng = random.Random(n)
+    tasks = random_tasks(rng, n)
+    assert logic.prioritize_patients(tasks) == sorted(tasks, key=logic.triage_key)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+import grid as map_data
+from pathfinding import GridPathfinder
+from hpa import HierarchicalPathfinder
+
+
+def queries(rng, grid, distance, n=5):
+    rows, cols = grid.shape
+    for _ in range(n):
+        start = tuple(int(x) for x in rng.randint(0, [rows, cols]))
+        end = tuple(int(x) for x in rng.randint(0, [rows, cols]))
+        if start != end and grid[start] != map_data.ID_WALL and grid[end] != map_data.ID_WALL:
+            yield start, end, distance(grid, start, end)
+
+
+def assert_walk(grid, start, end, path):
+    """path is a walk of single 4-connected steps over open cells ending at end."""
+    assert path[-1] == end
+    prev = start
+    for cell in path:
+        assert abs(cell[0] - prev[0]) + abs(cell[1] - prev[1]) == 1
+        assert grid[tuple(cell)] != map_data.ID_WALL
+        prev = cell
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_astar_and_jps_match_bfs(seed, make_grid, distance):
+    rng = np.random.RandomState(seed)
+    grid = make_grid(rng)
+    finder = GridPathfinder(grid)
+    for start, end, dist in queries(rng, grid, distance):
+        for path in (finder.astar(start, end), finder.jps(start, end)):
+            if dist is None:
+                assert path == []
+            else:
+                assert len(path) == dist
+                assert_walk(grid, start, end, [tuple(p) for p in path])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_hpa_paths(seed, make_grid, distance):
+    rng = np.random.RandomState(seed)
+    grid = make_grid(rng)
+    # clusters of 4 and 8 exercise the abstract graph; one cluster over the whole grid is a plain search
+    for size, exact in ((4, False), (8, False), (max(grid.shape), True)):
+        finder = HierarchicalPathfinder(grid, cluster_size=size)
+        for start, end, dist in queries(rng, grid, distance):
+            path = [tuple(p) for p in finder.find_path(start, end)]
+            if dist is None:
+                assert path == []
+                continue
+            assert_walk(grid, start, end, path)
+            # near-optimal, never shorter than the true distance
+            assert len(path) >= dist
+            if exact:
+                assert len(path) == dist
+
+
+def test_sync_after_edit(make_grid, distance):
+    rng = np.random.RandomState(7)
+    grid = make_grid(rng, walls=0.2)
+    finder = GridPathfinder(grid)
+    hpa = HierarchicalPathfinder(grid, cluster_size=8)
+    for version in range(1, 11):
+        cell = tuple(int(x) for x in rng.randint(0, grid.shape))
+        grid[cell] = map_data.ID_HALLWAY if grid[cell] == map_data.ID_WALL else map_data.ID_WALL
+        finder.sync(grid, version)
+        hpa.sync(grid, version, [cell])
+        for start, end, dist in queries(rng, grid, distance):
+            assert len(finder.astar(start, end)) == (dist or 0)
+            assert bool(hpa.find_path(start, end)) == (dist is not None)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import grid as map_data
+import routing
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_repair_matches_fresh_build(seed, make_grid, distance):
+    rng = np.random.RandomState(seed)
+    grid = make_grid(rng, walls=0.25, sizes=(5, 30))
+    rows, cols = grid.shape
+    targets = {f"t{k}": (int(rng.randint(rows)), int(rng.randint(cols))) for k in range(3)}
+    routes = routing.RouteCache(targets)
+    routes.build(grid)
+    for grid_version in range(1, 7):
+        # close and reopen a few cells, targets included now and then
+        cells = rng.randint(0, rows * cols, rng.randint(1, 6))
+        grid.flat[cells] = np.where(grid.flat[cells] == map_data.ID_WALL, map_data.ID_HALLWAY, map_data.ID_WALL)
+        version = routes.version
+        routes.sync(grid, grid_version, [divmod(int(k), cols) for k in cells])
+        assert routes.version != version
+        routes.sync(grid, grid_version)
+        assert routes.version == version + 1
+
+        fresh = routing.RouteCache(targets)
+        fresh.build(grid)
+        assert (routes.dist == fresh.dist).all()
+        for dist, hop in zip(routes.dist, routes.next_hop):
+            assert (hop[dist < 0] == -1).all()
+            ok = dist > 0
+            assert (dist[hop[ok]] == dist[ok] - 1).all()
+        for target in targets.values():
+            start = (int(rng.randint(rows)), int(rng.randint(cols)))
+            path = routes.path(grid, start, target)
+            assert len(path) == (routes.distance(grid, start, target) or 0)
+            if grid[start] != map_data.ID_WALL:
+                assert routes.distance(grid, start, target) == distance(grid, start, target)
+            assert all(grid[p] != map_data.ID_WALL for p in path)
@@ -0,0 +1,51 @@
+import gc
+import time
+import weakref
+import runner
+
+
+class Counter:
+    """Stands in for a Simulation: counts steps, optionally slowly."""
+    def __init__(self, delay=0.0):
+        self.steps = 0
+        self.delay = delay
+
+    def step(self):
+        time.sleep(self.delay)
+        self.steps += 1
+
+
+def test_start_and_stop():
+    r = runner.SimRunner(Counter(), tick_rate=1000)
+    r.start()
+    time.sleep(0.05)
+    assert r.stop()
+    assert not r.running
+    steps = r.sim.steps
+    assert steps > 0 and r.ticks == steps
+    time.sleep(0.02)
+    assert r.sim.steps == steps
+
+
+def test_stop_keeps_thread_until_it_ends():
+    r = runner.SimRunner(Counter(delay=0.3), tick_rate=1000)
+    r.start()
+    time.sleep(0.05)
+    # still inside a step: the thread is not dropped, so start() can't launch a second one
+    assert not r.stop(timeout=0.01)
+    assert r.running
+    r.start()
+    assert r.stop(timeout=2.0)
+    assert not r.running
+
+
+def test_abandoned_runner_stops():
+    r = runner.SimRunner(Counter(), tick_rate=1000)
+    r.start()
+    thread = r._thread
+    sim = weakref.ref(r.sim)
+    del r
+    gc.collect()
+    thread.join(1.0)
+    assert not thread.is_alive()
+    assert sim() is None
@@ -0,0 +1,72 @@
+import io
+import contextlib
+import grid as map_data
+import simulation
+
+
+def task(i, target, weight=1.0, ctas=3, urgency=3):
+    return {"id": i, "item": "Medical Supplies", "target": target, "urgency": urgency,
+            "ctas": ctas, "weight": weight, "arrival_time": 0.0}
+
+
+def run(sim, ticks):
+    """One step() per tick; (tick, status, pos, moved) after each."""
+    seen = []
+    with contextlib.redirect_stdout(io.StringIO()):  # backend.Drone prints every load
+        for _ in range(ticks):
+            moved = sim.step()
+            d = sim.drones[0]
+            seen.append((sim.tick, d['status'], tuple(d['pos']), moved))
+    return seen
+
+
+def test_delivery_cycle():
+    sim = simulation.Simulation(n_drones=1)
+    sim.submit(task("t1", "ICU"))
+    seen = run(sim, 30)
+    statuses = [s for _, s, _, _ in seen]
+    assert statuses[0] == "DELIVERING: Medical Supplies"
+    # delivering until the path runs out, then idle at the target for good
+    done = statuses.index("IDLE")
+    assert set(statuses[:done]) == {"DELIVERING: Medical Supplies"}
+    assert set(statuses[done:]) == {"IDLE"}
+    assert all(moved for _, _, _, moved in seen[:done])
+    assert not any(moved for _, _, _, moved in seen[done:])
+    assert {pos for _, _, pos, _ in seen[done:]} == {map_data.TARGETS["ICU"]}
+    assert sim.completed == [{"id": "t1", "request": 0, "delivered": done, "drone": "D1"}]
+    assert sim.tick == 30
+
+
+def test_low_battery_returns_and_charges():
+    sim = simulation.Simulation(n_drones=1)
+    d = sim.drones[0]
+    d['obj'].battery = 25.0
+    d['obj'].yposition, d['obj'].xposition = 6, 6
+    d['pos'] = [6, 6]
+    seen = run(sim, 60)
+    hub = map_data.TARGETS["Hub"]
+    order = [s for k, (_, s, _, _) in enumerate(seen) if k == 0 or s != seen[k - 1][1]]
+    assert order == ["RETURNING", "IDLE", "CHARGING", "IDLE"]
+    # it lands on the hub, charges from the next tick and leaves the bay full
+    landed = next(k for k, (_, s, _, _) in enumerate(seen) if s != "RETURNING")
+    assert seen[landed][2] == hub
+    assert seen[landed + 1][1] == "CHARGING"
+    assert d['obj'].battery == 100.0
+    assert not sim.charging.holding
+
+
+def test_step_n_matches_single_steps():
+    sims = [simulation.Simulation(n_drones=3) for _ in range(2)]
+    for sim in sims:
+        for k, target in enumerate(["ICU", "OR", "ER", "Maternity"]):
+            sim.submit(task(f"t{k}", target, weight=2.0 + k, ctas=k + 1))
+    with contextlib.redirect_stdout(io.StringIO()):
+        moved = sims[0].step(120)
+        for _ in range(119):
+            sims[1].step()
+        assert sims[1].step() == moved
+    a, b = sims
+    assert a.tick == b.tick == 120
+    assert a.completed == b.completed and len(a.completed) == 4
+    for da, db in zip(a.drones, b.drones):
+        assert (da['status'], da['pos'], da['obj'].battery) == (db['status'], db['pos'], db['obj'].battery)
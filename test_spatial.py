@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import spatial
+
+
+def linear_nearest(cells, target, k, travel, cols):
+    flat = np.array([r * cols + c for r, c in cells.values()], dtype=np.int64)
+    dist = np.asarray(travel(flat), dtype=float)
+    found = sorted((d, drone) for d, drone in zip(dist.tolist(), cells) if d != float("inf"))
+    return found[:k]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_nearest_matches_linear_scan(seed):
+    rng = np.random.RandomState(seed)
+    rows, cols = rng.randint(5, 60, 2)
+    index = spatial.DroneIndex((rows, cols), bucket=int(rng.randint(1, 8)))
+    cells = {}
+    for drone in range(rng.randint(1, 80)):
+        cells[drone] = (int(rng.randint(rows)), int(rng.randint(cols)))
+        index.update(drone, cells[drone])
+    # move some, drop some
+    for drone in list(cells)[::3]:
+        cells[drone] = (int(rng.randint(rows)), int(rng.randint(cols)))
+        index.update(drone, cells[drone])
+    for drone in list(cells)[1::5]:
+        index.update(drone, cells.pop(drone), available=False)
+    assert len(index) == len(cells)
+
+    # travel is the Manhattan distance plus a detour, and some cells can't be reached
+    detour = rng.randint(0, 6, rows * cols).astype(float)
+    detour[rng.rand(rows * cols) < 0.1] = np.inf
+    for _ in range(10):
+        target = (int(rng.randint(rows)), int(rng.randint(cols)))
+
+        def travel(flat):
+            r, c = np.divmod(flat, cols)
+            return np.abs(r - target[0]) + np.abs(c - target[1]) + detour[flat]
+
+        k = int(rng.randint(1, 10))
+        got = index.nearest(target, k, travel)
+        want = linear_nearest(cells, target, k, travel, cols)
+        # ties may pick different drones, the distances must agree
+        assert [d for d, _ in got] == [d for d, _ in want]
+        for d, drone in got:
+            assert drone in cells
+            assert d == travel(np.array([cells[drone][0] * cols + cells[drone][1]]))[0]
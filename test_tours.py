@@ -0,0 +1,15 @@
+import numpy as np
+import logic
+import tours
+
+
+def test_tour_ranks_like_its_lead_stop():
+    rng = np.random.RandomState(0)
+    for _ in range(200):
+        stops = [{"id": str(k), "target": "ICU", "item": "x", "weight": 1.0,
+                  "urgency": int(rng.randint(1, 6)), "ctas": int(rng.randint(1, 6)),
+                  "arrival_time": float(rng.randint(0, 50))} for k in range(rng.randint(1, 5))]
+        task = tours.tour_task(stops, 10.0)
+        lead = min(stops, key=logic.triage_key)
+        assert task["id"] == f"tour-{lead['id']}"
+        assert logic.triage_key(task) == logic.triage_key(lead)
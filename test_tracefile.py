@@ -0,0 +1,72 @@
+import io
+import os
+import contextlib
+import numpy as np
+import pytest
+import grid as map_data
+import simulation
+import sweep
+import tracefile
+
+
+@pytest.fixture
+def renamed_plan(tmp_path):
+    """The built-in map with the ICU saved as "Pharmacy", loaded as the floor plan."""
+    saved = dict(map_data.TARGETS), list(map_data.LABELS), list(map_data.COLOR_MAP), map_data._PLAN
+    codes = {"Hub": map_data.ID_HUB, "Maternity": map_data.ID_MATERNITY, "Pharmacy": map_data.ID_ICU,
+             "Waiting Room": map_data.ID_WAITING, "ER": map_data.ID_ER, "OR": map_data.ID_OR}
+    old = {"Pharmacy": "ICU"}
+    rooms = [{"name": name, "id": code, "color": map_data.COLOR_MAP[2 * code][1],
+              "target": list(map_data.TARGETS[old.get(name, name)])} for name, code in codes.items()]
+    path = os.path.join(tmp_path, "plan.json")
+    map_data.save_floor_plan(path, map_data.create_floor_plan(), rooms, labels=[])
+    map_data.use_floor_plan(map_data.load_floor_plan(path))
+    yield
+    targets, labels, colors, map_data._PLAN = saved
+    map_data.TARGETS.clear()
+    map_data.TARGETS.update(targets)
+    map_data.LABELS[:] = labels
+    map_data.COLOR_MAP[:] = colors
+
+
+def test_dispatch_names_rooms_of_the_current_plan(renamed_plan, tmp_path):
+    path = os.path.join(tmp_path, "run.trace")
+    writer = tracefile.TraceWriter(path, 3)
+    sim = simulation.Simulation(trace=writer)
+    sim.submit({"id": "t1", "item": "Medical Supplies", "target": "Pharmacy", "urgency": 3,
+                "ctas": 2, "weight": 1.0, "arrival_time": 0.0})
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.step(5)
+    writer.close()
+
+    dispatched = tracefile.TraceReader(path).events(kind=tracefile.DISPATCH)
+    assert len(dispatched) == 1
+    assert list(map_data.TARGETS)[dispatched["aux"][0]] == "Pharmacy"
+
+
+@pytest.mark.parametrize("bays", [None, 1])
+def test_state_at_matches_live_fleet(tmp_path, bays):
+    path = os.path.join(tmp_path, "run.trace")
+    # a short keyframe interval, so the run crosses many of them
+    writer = tracefile.TraceWriter(path, 6, keyframe_every=16, buffer_size=64)
+    sim = simulation.Simulation(n_drones=6, trace=writer, bays=bays)
+    rng = np.random.default_rng(4)
+    requests = sweep.synthetic_requests(rng, 400, 0.15)
+    live = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for tick in range(400):
+            while requests and requests[0][0] <= tick:
+                sim.submit(requests.pop(0)[1])
+            sim.step()
+            live.append([(d['pos'][0], d['pos'][1], d['obj'].battery, tracefile.status_code(d['status']))
+                         for d in sim.drones])
+    writer.close()
+
+    reader = tracefile.TraceReader(path)
+    assert len(reader.events(kind=tracefile.SNAPSHOT)) == 6 * 25
+    assert len(reader.events(kind=tracefile.CHARGE)) > 0
+    for tick, drones in enumerate(live):
+        state = reader.state_at(tick)
+        for i, (row, col, bat, status) in enumerate(drones):
+            assert (state["row"][i], state["col"][i], state["status"][i]) == (row, col, status)
+            assert state["bat"][i] == np.float32(bat)
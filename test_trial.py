@@ -0,0 +1,71 @@
+from collections import deque
+import pytest
+import trial
+
+
+def reference_path(grid, start, goal):
+    """bfs_shortest_path as it was, copying the path into every queue entry."""
+    (sx, sy) = start
+    (gx, gy) = goal
+    start_region = grid[sy][sx]
+    goal_region = grid[gy][gx]
+    queue = deque([(start, [start])])
+    visited = set([start])
+    while queue:
+        (x, y), path = queue.popleft()
+        if (x, y) == goal:
+            return path
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < trial.GRID_WIDTH and 0 <= ny < trial.GRID_HEIGHT:
+                if not trial.is_walkable(grid[ny][nx], start_region, goal_region):
+                    continue
+                if (nx, ny) not in visited:
+                    visited.add((nx, ny))
+                    queue.append(((nx, ny), path + [(nx, ny)]))
+    return None
+
+
+def cells():
+    return [(x, y) for y in range(trial.GRID_HEIGHT) for x in range(trial.GRID_WIDTH)]
+
+
+def boxed_floor():
+    """The built-in plan with the ICU walled in by Maternity, so only a third room leads there."""
+    floor = trial.build_floor_plan()
+    for y in range(3, 9):
+        for x in range(3, 9):
+            if floor[y][x] == trial.HALL:
+                floor[y][x] = trial.MATERNITY
+    return floor
+
+
+@pytest.mark.parametrize("floor", [trial.build_floor_plan(), boxed_floor()], ids=["plan", "boxed"])
+def test_region_fields_match_reference(floor):
+    fields = trial.RegionFields(floor)
+    for start in trial.REGION_CENTERS.values():
+        for goal in cells():
+            want = reference_path(floor, start, goal)
+            assert fields.path(start, goal) == want
+            assert trial.bfs_shortest_path(floor, start, goal) == want
+            assert fields.distance(start, goal) == (None if want is None else len(want) - 1)
+
+
+def test_paths_stay_in_start_goal_and_hallways():
+    floor = trial.build_floor_plan()
+    fields = trial.RegionFields(floor)
+    for start in trial.REGION_CENTERS.values():
+        for goal in trial.REGION_CENTERS.values():
+            path = fields.path(start, goal)
+            allowed = {trial.HALL, floor[start[1]][start[0]], floor[goal[1]][goal[0]]}
+            assert {floor[y][x] for x, y in path} <= allowed
+
+
+def test_walled_in_region_is_unreachable():
+    floor = boxed_floor()
+    fields = trial.RegionFields(floor)
+    hub, icu = trial.REGION_CENTERS["HUB"], trial.REGION_CENTERS["ICU"]
+    # through Maternity is the only way, and Maternity is neither end of the trip
+    assert fields.path(hub, icu) is None
+    assert fields.distance(hub, icu) is None
+    assert fields.path(hub, trial.REGION_CENTERS["MATERNITY"]) is not None
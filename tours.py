@@ -0,0 +1,212 @@
+import time
+import backend
+import grid as map_data
+import logic
+from energy import DRAIN
+
+MAX_PAYLOAD = 15.0  # weight_to_multiplier refuses anything this heavy
+
+# latest delivery after launch, from the urgency scale on the dispatch form (one tick = one second)
+DEADLINE_TICKS = {1: 3600, 2: 1800, 3: 900, 4: 480, 5: 240}
+
+
+class TourPlanner:
+    """
+    Groups staged tasks into multi-stop tours from the hub.
+
+    A tour is feasible if its load stays under the payload cap, every stop
+    is reached before its urgency deadline, and the battery it uses (the
+    backend.Drone.update model: 0.5 * weight_to_multiplier(current load)
+    per step, lighter after each drop, empty back to the hub) fits in
+    `battery - reserve`. Tours are built with Clarke-Wright savings and then
+    improved with 2-opt and or-opt moves until nothing improves or the time
+    budget runs out; the objective is total battery used.
+    """
+    def __init__(self, grid, routes, hub=None, capacity=MAX_PAYLOAD, battery=100.0, reserve=5.0):
+        self.grid = grid
+        self.routes = routes
+        self.hub = tuple(map_data.TARGETS["Hub"] if hub is None else hub)
+        self.capacity = capacity
+        self.battery = battery
+        self.reserve = reserve
+        self._dist = {}
+
+    def distance(self, a, b):
+        """Steps between two target names (None = Hub), or None if unreachable."""
+        key = (a, b)
+        if key not in self._dist:
+            start = self.hub if a is None else map_data.TARGETS[a]
+            end = self.hub if b is None else map_data.TARGETS[b]
+            self._dist[key] = 0 if start == end else self.routes.distance(self.grid, start, end)
+        return self._dist[key]
+
+    def evaluate(self, tour):
+        """(battery used, feasible) for visiting tour's tasks in order from the hub."""
+        load = sum(t['weight'] for t in tour)
+        mult = backend.weight_to_multiplier(load)
+        ok = mult is not None and load <= self.capacity
+        if mult is None:
+            mult = 1.0  # too heavy to load, the drone flies empty
+        used, ticks, here = 0.0, 0, None
+        for task in tour:
+            steps = self.distance(here, task['target'])
+            if steps is None:
+                return float("inf"), False
+            used += DRAIN * mult * steps
+            ticks += steps
+            if ticks > DEADLINE_TICKS.get(task['urgency'], DEADLINE_TICKS[1]):
+                ok = False
+            load -= task['weight']
+            mult = backend.weight_to_multiplier(load) or 1.0
+            here = task['target']
+        back = self.distance(here, None)
+        if back is None:
+            return float("inf"), False
+        used += DRAIN * back
+        return used, ok and used <= self.battery - self.reserve
+
+    def plan(self, tasks, time_budget=0.05):
+        """Split tasks into tours; returns a list of task lists in visiting order."""
+        deadline = time.perf_counter() + time_budget
+        self._dist = {}  # the grid may have changed since the last batch
+        tours = self._savings(list(tasks))
+        self._improve(tours, deadline)
+        return [t for t in tours if t]
+
+    # construction
+    def _savings(self, tasks):
+        tours = [[t] for t in tasks]
+        where = {id(t): i for i, t in enumerate(tasks)}
+        pairs = []
+        for i, a in enumerate(tasks):
+            for b in tasks[i + 1:]:
+                d_ab = self.distance(a['target'], b['target'])
+                d_a = self.distance(None, a['target'])
+                d_b = self.distance(None, b['target'])
+                if None not in (d_ab, d_a, d_b):
+                    pairs.append((d_a + d_b - d_ab, a, b))
+        pairs.sort(key=lambda p: -p[0])
+
+        cost = [self.evaluate(t)[0] for t in tours]
+        load = [t[0]['weight'] for t in tours]
+        for _, a, b in pairs:
+            ia, ib = where[id(a)], where[id(b)]
+            if ia == ib or load[ia] + load[ib] > self.capacity:
+                continue
+            ta, tb = tours[ia], tours[ib]
+            # join at the ends the two tasks sit on
+            options = []
+            if ta[-1] is a and tb[0] is b:
+                options.append(ta + tb)
+            if tb[-1] is b and ta[0] is a:
+                options.append(tb + ta)
+            if ta[-1] is a and tb[-1] is b:
+                options.append(ta + tb[::-1])
+            if ta[0] is a and tb[0] is b:
+                options.append(ta[::-1] + tb)
+            apart = cost[ia] + cost[ib]
+            best = None
+            for merged in options:
+                used, ok = self.evaluate(merged)
+                if ok and used < apart and (best is None or used < best[0]):
+                    best = (used, merged)
+            if best is not None:
+                tours[ia] = best[1]
+                tours[ib] = []
+                cost[ia], load[ia] = best[0], load[ia] + load[ib]
+                for t in best[1]:
+                    where[id(t)] = ia
+        return [t for t in tours if t]
+
+    # local search
+    def _cost(self, tour):
+        if not tour:
+            return 0.0, True
+        if len(tour) == 1:
+            return self.evaluate(tour)[0], True  # a lone task always goes, as before batching
+        return self.evaluate(tour)
+
+    def _improve(self, tours, deadline):
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for k in range(len(tours)):
+                if self._two_opt(tours, k, deadline):
+                    improved = True
+            if self._or_opt(tours, deadline):
+                improved = True
+
+    def _two_opt(self, tours, k, deadline):
+        # reverse a stretch of one tour
+        tour = tours[k]
+        best = self._cost(tour)[0]
+        found = False
+        for i in range(len(tour) - 1):
+            for j in range(i + 2, len(tour) + 1):
+                if time.perf_counter() > deadline:
+                    return found
+                cand = tour[:i] + tour[i:j][::-1] + tour[j:]
+                used, ok = self._cost(cand)
+                if ok and used < best - 1e-9:
+                    tour, best, found = cand, used, True
+        tours[k] = tour
+        return found
+
+    def _or_opt(self, tours, deadline):
+        # move a run of 1-3 stops to another place in the same or another tour
+        found = False
+        for a in range(len(tours)):
+            for seg in (1, 2, 3):
+                i = 0
+                while i + seg <= len(tours[a]):
+                    if time.perf_counter() > deadline:
+                        return found
+                    if self._relocate(tours, a, i, seg):
+                        found = True
+                    else:
+                        i += 1
+        return found
+
+    def _relocate(self, tours, a, i, seg):
+        src = tours[a]
+        run, rest = src[i:i + seg], src[:i] + src[i + seg:]
+        rest_cost, rest_ok = self._cost(rest)
+        src_cost = self._cost(src)[0]
+        for b in range(len(tours)):
+            if b == a:
+                dst, before, extra = rest, src_cost, 0.0
+            elif tours[b] and rest_ok:
+                dst = tours[b]
+                before, extra = src_cost + self._cost(dst)[0], rest_cost
+            else:
+                continue
+            for piece in ((run, run[::-1]) if seg > 1 else (run,)):
+                for p in range(len(dst) + 1):
+                    cand = dst[:p] + piece + dst[p:]
+                    used, ok = self._cost(cand)
+                    if ok and extra + used < before - 1e-9:
+                        tours[a] = rest
+                        tours[b] = cand
+                        return True
+        return False
+
+
+def tour_task(stops, energy):
+    """
+    One queue entry for a tour: ranked exactly like its most urgent stop
+    (the lowest triage_key), carrying the total load and the battery the
+    tour uses from the hub.
+    """
+    lead = min(stops, key=logic.triage_key)
+    return {
+        "id": f"tour-{lead['id']}",
+        "item": f"{len(stops)} items",
+        "target": stops[0]['target'],
+        "urgency": lead['urgency'],
+        "ctas": lead['ctas'],
+        "weight": sum(s['weight'] for s in stops),
+        "location": stops[0]['target'],
+        "arrival_time": lead['arrival_time'],
+        "stops": list(stops),
+        "energy": energy,
+    }
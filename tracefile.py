@@ -0,0 +1,154 @@
+import struct
+import numpy as np
+import grid as map_data
+import fleet
+
+# record kinds
+SNAPSHOT = 0     # keyframe: full state of one drone, aux = status code
+STEP = 1
+DISPATCH = 2     # aux = target_index() of the room
+DELIVERY = 3
+LOW_BATTERY = 4
+RETURNED = 5
+CHARGE = 6
+CHARGED = 7
+KIND_NAMES = ("SNAPSHOT", "STEP", "DISPATCH", "DELIVERY", "LOW_BATTERY", "RETURNED", "CHARGE", "CHARGED")
+
+# status each kind leaves the drone in (-1 = unchanged)
+KIND_STATUS = np.array([-1, -1, fleet.DELIVERING, fleet.IDLE, fleet.RETURNING,
+                        fleet.IDLE, fleet.CHARGING, fleet.IDLE], dtype=np.int16)
+
+RECORD = np.dtype([("tick", "<u4"), ("kind", "u1"), ("drone", "<u2"), ("row", "<u2"),
+                   ("col", "<u2"), ("bat", "<f4"), ("aux", "<i2")])
+
+MAGIC = b"DRTRACE1"
+HEADER = struct.Struct("<8sHI")   # magic, drones, keyframe interval
+
+
+def target_index(name):
+    """Position of a room in the current floor plan's TARGETS (DISPATCH aux)."""
+    return list(map_data.TARGETS).index(name)
+
+
+def status_code(status):
+    """Map a Simulation status string ("DELIVERING: Blood", ...) to a fleet status code."""
+    return fleet.STATUS_NAMES.index(status.split(":")[0])
+
+
+class TraceWriter:
+    """
+    Append-only binary trace of a simulation run.
+
+    Fixed 17-byte records (tick, kind, drone, row, col, battery, aux) are
+    buffered in memory and written out every `buffer_size` records, so
+    memory stays bounded however long the run is. A keyframe of every
+    drone is written every `keyframe_every` ticks so the reader can
+    rebuild state from the nearest keyframe instead of the file start.
+    """
+    def __init__(self, path, n_drones, keyframe_every=500, buffer_size=8192):
+        self.path = path
+        self.n_drones = n_drones
+        self.keyframe_every = keyframe_every
+        self.buffer_size = buffer_size
+        self._buf = []
+        self._f = open(path, "wb")
+        self._f.write(HEADER.pack(MAGIC, n_drones, keyframe_every))
+
+    def record(self, tick, kind, drone, row, col, bat, aux=0):
+        self._buf.append((tick, kind, drone, row, col, bat, aux))
+        if len(self._buf) >= self.buffer_size:
+            self.flush()
+
+    def keyframe(self, tick, drones):
+        """drones: Simulation.drones (dicts with pos, bat, status)."""
+        for i, d in enumerate(drones):
+            self.record(tick, SNAPSHOT, i, d['pos'][0], d['pos'][1], d['bat'], status_code(d['status']))
+
+    def flush(self):
+        if self._buf:
+            self._f.write(np.array(self._buf, dtype=RECORD).tobytes())
+            self._buf = []
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """
+    Memory-mapped reader for TraceWriter files.
+    Records are in tick order, so seeking is a binary search on the tick column.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, self.n_drones, self.keyframe_every = HEADER.unpack(f.read(HEADER.size))
+            f.seek(0, 2)
+            size = f.tell()
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a drone trace")
+        # ignore a partially written last record
+        count = (size - HEADER.size) // RECORD.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+        self.ticks = self.records["tick"]
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def last_tick(self):
+        return int(self.ticks[-1]) if len(self.ticks) else 0
+
+    def seek(self, tick):
+        """Index of the first record at or after tick."""
+        return int(np.searchsorted(self.ticks, tick, side="left"))
+
+    def events(self, start=None, stop=None, kind=None, drone=None):
+        """Records with start <= tick <= stop, optionally filtered by kind and drone."""
+        lo = 0 if start is None else self.seek(start)
+        hi = len(self.records) if stop is None else int(np.searchsorted(self.ticks, stop, side="right"))
+        recs = self.records[lo:hi]
+        mask = np.ones(len(recs), dtype=bool)
+        if kind is not None:
+            mask &= recs["kind"] == kind
+        if drone is not None:
+            mask &= recs["drone"] == drone
+        return np.asarray(recs[mask])
+
+    def state_at(self, tick):
+        """
+        Fleet state after everything recorded up to and including tick:
+        dict of row, col, bat and status arrays indexed by drone.
+        """
+        key = (tick // self.keyframe_every) * self.keyframe_every
+        recs = np.asarray(self.records[self.seek(key):int(np.searchsorted(self.ticks, tick, side="right"))])
+        n = self.n_drones
+        order = np.arange(len(recs))
+
+        # last record of any kind carries the latest position and battery
+        last = np.full(n, -1)
+        np.maximum.at(last, recs["drone"], order)
+        # last record that changed the status
+        status = np.where(recs["kind"] == SNAPSHOT, recs["aux"], KIND_STATUS[recs["kind"]])
+        changes = status >= 0
+        last_status = np.full(n, -1)
+        np.maximum.at(last_status, recs["drone"][changes], order[changes])
+
+        if (last < 0).any() or (last_status < 0).any():
+            raise ValueError(f"no keyframe covers tick {tick}")
+        return {
+            "row": recs["row"][last].astype(int),
+            "col": recs["col"][last].astype(int),
+            "bat": recs["bat"][last].astype(float),
+            "status": status[last_status].astype(int),
+        }
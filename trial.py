@@ -85,6 +85,57 @@ def is_walkable(cell, start_region, goal_region):
     return False
 
 
+def _bfs(grid, start, start_region, goal_region, goal=None):
+    """
+    BFS from start through cells is_walkable allows for the two regions,
+    keeping one parent pointer per cell (flat index y * GRID_WIDTH + x).
+    Stops early once goal is reached, if given.
+    """
+    (sx, sy) = start
+    size = GRID_WIDTH * GRID_HEIGHT
+    dist = [-1] * size
+    parent = [-1] * size
+    s = sy * GRID_WIDTH + sx
+    dist[s] = 0
+    queue = deque([s])
+    stop = None if goal is None else goal[1] * GRID_WIDTH + goal[0]
+
+    while queue:
+        cur = queue.popleft()
+        if cur == stop:
+            break
+        y, x = divmod(cur, GRID_WIDTH)
+        for dx,dy in [(1,0),(-1,0),(0,1),(0,-1)]:
+            nx, ny = x+dx, y+dy
+            if 0 <= nx < GRID_WIDTH and 0 <= ny < GRID_HEIGHT:
+                nxt = ny * GRID_WIDTH + nx
+                if dist[nxt] >= 0:
+                    continue
+                if not is_walkable(grid[ny][nx], start_region, goal_region):
+                    continue
+                dist[nxt] = dist[cur] + 1
+                parent[nxt] = cur
+                queue.append(nxt)
+
+    return dist, parent
+
+
+def _walk_back(parent, start, goal):
+    """Path start..goal from parent pointers, or None if goal wasn't reached."""
+    s = start[1] * GRID_WIDTH + start[0]
+    cur = goal[1] * GRID_WIDTH + goal[0]
+    if cur != s and parent[cur] < 0:
+        return None
+    path = []
+    while cur != s:
+        y, x = divmod(cur, GRID_WIDTH)
+        path.append((x, y))
+        cur = parent[cur]
+    path.append(start)
+    path.reverse()
+    return path
+
+
 def bfs_shortest_path(grid, start, goal):
     (sx, sy) = start
     (gx, gy) = goal
@@ -92,26 +143,37 @@ def bfs_shortest_path(grid, start, goal):
     start_region = grid[sy][sx]
     goal_region  = grid[gy][gx]
 
-    queue = deque([(start, [start])])
-    visited = set([start])
-
-    while queue:
-        (x,y), path = queue.popleft()
+    _, parent = _bfs(grid, start, start_region, goal_region, goal)
+    return _walk_back(parent, start, goal)
 
-        if (x,y) == goal:
-            return path
 
-        for dx,dy in [(1,0),(-1,0),(0,1),(0,-1)]:
-            nx, ny = x+dx, y+dy
-            if 0 <= nx < GRID_WIDTH and 0 <= ny < GRID_HEIGHT:
-                cell = grid[ny][nx]
-                if not is_walkable(cell, start_region, goal_region):
-                    continue
-                if (nx,ny) not in visited:
-                    visited.add((nx,ny))
-                    queue.append(((nx,ny), path + [(nx,ny)]))
-
-    return None
+class RegionFields:
+    """
+    Distance fields from each REGION_CENTERS entry, one per region the path
+    may end in (that region plus the hallways and the start's own room are
+    walkable), built on first use and kept for the floor plan.
+    """
+    def __init__(self, floor):
+        self.floor = floor
+        self.fields = {}   # (start, goal region) -> (dist, parent)
+
+    def field(self, start, goal_region):
+        key = (start, goal_region)
+        if key not in self.fields:
+            (sx, sy) = start
+            self.fields[key] = _bfs(self.floor, start, self.floor[sy][sx], goal_region)
+        return self.fields[key]
+
+    def distance(self, start, goal):
+        (gx, gy) = goal
+        dist, _ = self.field(start, self.floor[gy][gx])
+        d = dist[gy * GRID_WIDTH + gx]
+        return None if d < 0 else d
+
+    def path(self, start, goal):
+        (gx, gy) = goal
+        _, parent = self.field(start, self.floor[gy][gx])
+        return _walk_back(parent, start, goal)
 
 def print_live_board(floor, drones):
     """Print hospital grid with drones shown as '9'."""
@@ -263,6 +325,7 @@ class Dispatcher:
         self.drones = drones
         self.tasks = []
         self.hub = REGION_CENTERS["HUB"]
+        self.fields = RegionFields(floor)
 
     def add_task(self, task):
         print(f" New task added: {task}")
@@ -282,7 +345,10 @@ class Dispatcher:
         region = task.region_name
         dest = REGION_CENTERS[region]
 
-        path = bfs_shortest_path(self.floor, self.hub, dest)
+        path = self.fields.path(self.hub, dest)
+        if path is None:
+            print(f"No path to {region}")
+            return False
         steps = len(path) - 1
 
         mult = weight_to_multiplier(task.supply.weight)